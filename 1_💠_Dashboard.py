@@ -3,20 +3,22 @@ import sqlite3
 from pathlib import Path
 from typing import Dict, List, Tuple, Optional
 import logging
+import uuid
 from datetime import datetime, timedelta
+from credentials import authenticate, create_user, ensure_credentials
+from database import get_pool
+from app_logging import bind_log_context, configure_logging
+from query_stats import query_stats
+from rate_limiter import get_login_limiter
 
-# Logging konfiguratsiyasi
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    filename='app.log'
-)
 logger = logging.getLogger(__name__)
 
 # Constants
 DATABASE_DIR = Path('data')
 MAX_LOGIN_ATTEMPTS = 3
 LOGIN_TIMEOUT_MINUTES = 15
+# Urinishlar hisoblagichi foydalanuvchilar bazasidan alohida faylda, barcha worker'lar uchun umumiy
+RATE_LIMIT_DB = DATABASE_DIR / 'rate_limits.db'
 
 USER_TYPES = {
     'Doktor': {'db_name': 'doctors', 'table': 'DOCTORS'},
@@ -26,14 +28,17 @@ USER_TYPES = {
 class DatabaseManager:
     def __init__(self, db_path: Path):
         self.db_path = db_path
+        self.conn = None
         
     def __enter__(self):
-        self.conn = sqlite3.connect(self.db_path)
+        # Ulanish har safar ochilmaydi, umumiy puldan olinadi
+        self.conn = get_pool(self.db_path).acquire()
         return self.conn
         
     def __exit__(self, exc_type, exc_val, exc_tb):
         if self.conn:
-            self.conn.close()
+            get_pool(self.db_path).release(self.conn)
+            self.conn = None
 
 class SessionManager:
     @staticmethod
@@ -66,32 +71,23 @@ class SessionManager:
 
 class AuthenticationManager:
     def __init__(self):
-        self.attempts = {}
-        self.blocked_until = {}
+        # Cheklovchi modul darajasida saqlanadi, shuning uchun qayta ishga tushishlarda yo'qolmaydi
+        self.limiter = get_login_limiter(RATE_LIMIT_DB, MAX_LOGIN_ATTEMPTS,
+                                         LOGIN_TIMEOUT_MINUTES * 60, LOGIN_TIMEOUT_MINUTES * 60)
     
-    def can_attempt(self, username: str) -> bool:
-        now = datetime.now()
-        if username in self.blocked_until:
-            if now < self.blocked_until[username]:
-                return False
-            else:
-                del self.blocked_until[username]
-                if username in self.attempts:
-                    del self.attempts[username]
-        return True
+    @staticmethod
+    def _limit_key(username: str, role: str) -> str:
+        return f"{role}:{username}"
     
-    def record_attempt(self, username: str):
-        now = datetime.now()
-        if username not in self.attempts:
-            self.attempts[username] = 1
-        else:
-            self.attempts[username] += 1
-            
-        if self.attempts[username] >= MAX_LOGIN_ATTEMPTS:
-            self.blocked_until[username] = now + timedelta(minutes=LOGIN_TIMEOUT_MINUTES)
+    def can_attempt(self, username: str, role: str) -> bool:
+        return self.limiter.retry_after(self._limit_key(username, role)) == 0
+    
+    def record_attempt(self, username: str, role: str):
+        self.limiter.record_failure(self._limit_key(username, role))
     
     def authenticate_user(self, login: str, password: str, role: str) -> Optional[Dict]:
-        if not self.can_attempt(login):
+        # Bloklangan urinish foydalanuvchilar bazasiga murojaat qilmasdan rad etiladi
+        if not self.can_attempt(login, role):
             st.error(f"Ko'p marta noto'g'ri urinish. {LOGIN_TIMEOUT_MINUTES} daqiqa kutishingiz kerak.")
             return None
         
@@ -99,17 +95,16 @@ class AuthenticationManager:
         db_path = DATABASE_DIR / f"{user_type['db_name']}.db"
         
         try:
+            ensure_credentials(db_path, user_type['table'])
             with DatabaseManager(db_path) as conn:
-                cursor = conn.execute(
-                    f"SELECT id, login, parol FROM {user_type['table']} WHERE login = ? AND parol = ?",
-                    (login, password)
-                )
-                user = cursor.fetchone()
+                # LOGIN noyob indeks orqali topiladi, parol bcrypt xeshi bilan solishtiriladi
+                user = authenticate(conn, user_type['table'], login, password)
                 
                 if user:
-                    return {'id': user[0], 'login': user[1], 'role': role}
+                    self.limiter.reset(self._limit_key(login, role))
+                    return {'id': user.id, 'login': user.login, 'role': role}
                 
-                self.record_attempt(login)
+                self.record_attempt(login, role)
                 return None
                 
         except sqlite3.Error as e:
@@ -118,6 +113,12 @@ class AuthenticationManager:
 
 
 def main():
+    # Jurnal navbat orqali fon oqimida yoziladi (app.log, aylantirish bilan)
+    configure_logging()
+    rerun = query_stats.begin_rerun("Dashboard")
+    bind_log_context(st.session_state.setdefault('session_id', uuid.uuid4().hex[:12]),
+                     st.session_state.get('user_role'), rerun.rerun_id)
+
     # Initialize database directory
     DATABASE_DIR.mkdir(exist_ok=True)
     
@@ -169,12 +170,10 @@ def register():
                     return
                 
                 try:
-                    with DatabaseManager(DATABASE_DIR / 'doctors.db') as conn:
-                        conn.execute(
-                            "INSERT INTO DOCTORS (login, parol) VALUES (?, ?)",
-                            (reg_login, reg_password)
-                        )
-                        conn.commit()
+                    db_path = DATABASE_DIR / f"{USER_TYPES['Doktor']['db_name']}.db"
+                    ensure_credentials(db_path, USER_TYPES['Doktor']['table'])
+                    with DatabaseManager(db_path) as conn:
+                        create_user(conn, USER_TYPES['Doktor']['table'], reg_login, reg_password)
                         st.success("Ro'yxatdan o'tish muvaffaqiyatli amalga oshirildi!")
                 except sqlite3.IntegrityError:
                     st.error("Bunday login mavjud")
@@ -0,0 +1,134 @@
+"""Ilova jurnali: navbat orqali fon oqimida yoziladigan JSON yozuvlar.
+
+Streamlit skript oqimi faqat yozuvni xotiradagi navbatga qo'yadi; faylga
+yozish va aylantirish (rotation) ``QueueListener`` ning fon oqimida
+bajariladi. Navbat to'lib qolsa (xatolar to'lqini), yangi yozuvlar
+tashlab yuboriladi va hisoblanadi — so'rov oqimi hech qachon diskni kutmaydi.
+
+Har bir yozuvga joriy sessiya, foydalanuvchi roli va qayta ishga tushirish
+id si qo'shiladi; ular sahifa boshida ``bind_log_context()`` bilan beriladi.
+"""
+import atexit
+import copy
+import json
+import logging
+import queue
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from pathlib import Path
+from typing import Optional
+
+APP_LOG = Path('app.log')
+SLOW_QUERY_LOG = Path('slow_queries.log')
+MAX_LOG_BYTES = 5 * 1024 * 1024
+LOG_BACKUPS = 5
+QUEUE_SIZE = 10000
+
+_context = threading.local()
+_plain_formatter = logging.Formatter()
+
+
+def bind_log_context(session: Optional[str] = None, role: Optional[str] = None,
+                     rerun: Optional[str] = None):
+    """Joriy oqimdagi keyingi yozuvlar uchun sessiya, rol va qayta ishga tushirish id si"""
+    _context.session = session
+    _context.role = role
+    _context.rerun = rerun
+
+
+class ContextFilter(logging.Filter):
+    """Kontekst yozuvni navbatga qo'yayotgan oqimda olinadi (fon oqimida u yo'q)"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.session = getattr(_context, 'session', None)
+        record.role = getattr(_context, 'role', None)
+        record.rerun = getattr(_context, 'rerun', None)
+        return True
+
+
+class ExcludeFilter(logging.Filter):
+    """Berilgan logger (va uning bolalari) yozuvlarini o'tkazmaydi"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return not super().filter(record)
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'session': getattr(record, 'session', None),
+            'role': getattr(record, 'role', None),
+            'rerun': getattr(record, 'rerun', None),
+        }
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class DroppingQueueHandler(QueueHandler):
+    """Navbat to'la bo'lsa kutmasdan yozuvni tashlab yuboradi"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Xabar va istisno matni shu oqimda tayyorlanadi (traceback obyektlari navbatga o'tmaydi),
+        # JSON esa fon oqimida quriladi
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _plain_formatter.formatException(record.exc_info)
+        record.exc_info = None
+        return record
+
+
+_listener: Optional[QueueListener] = None
+_handler: Optional[DroppingQueueHandler] = None
+_setup_lock = threading.Lock()
+
+
+def _rotating_handler(path: Path) -> RotatingFileHandler:
+    handler = RotatingFileHandler(path, maxBytes=MAX_LOG_BYTES, backupCount=LOG_BACKUPS,
+                                  encoding='utf-8', delay=True)
+    handler.setFormatter(JsonFormatter())
+    return handler
+
+
+def configure_logging(level: int = logging.INFO) -> DroppingQueueHandler:
+    """Jurnal quvurini jarayon davomida bir marta o'rnatish; sahifalar har safar chaqirishi mumkin"""
+    global _listener, _handler
+    if _handler is not None:
+        return _handler
+    with _setup_lock:
+        if _handler is None:
+            log_queue: queue.Queue = queue.Queue(maxsize=QUEUE_SIZE)
+            # Ikkala fayl bitta navbatdan o'qiydi: sekin so'rovlar faqat o'z fayliga yoziladi
+            app_handler = _rotating_handler(APP_LOG)
+            app_handler.addFilter(ExcludeFilter('slow_queries'))
+            slow_handler = _rotating_handler(SLOW_QUERY_LOG)
+            slow_handler.addFilter(logging.Filter('slow_queries'))
+            _listener = QueueListener(log_queue, app_handler, slow_handler,
+                                      respect_handler_level=True)
+            _listener.start()
+            atexit.register(_listener.stop)
+
+            handler = DroppingQueueHandler(log_queue)
+            handler.addFilter(ContextFilter())
+            root = logging.getLogger()
+            root.addHandler(handler)
+            root.setLevel(level)
+            _handler = handler
+    return _handler
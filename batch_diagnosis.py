@@ -0,0 +1,174 @@
+"""Bemorlar faylini (CSV yoki JSONL) ommaviy tashxislash.
+
+Har bir qator bitta bemor: identifikator ustuni va symptoms.json dagi
+``id_code`` (x1..., b1...) ustunlari 0/1 qiymatlari bilan. Natija har bir
+bemor uchun tartiblangan tashxislar ro'yxati.
+
+    python batch_diagnosis.py bemorlar.csv -o natija.jsonl --top-k 3
+"""
+import argparse
+import csv
+import json
+import logging
+import os
+import sqlite3
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from diagnosis_engine import CATALOG_PATH, CATALOG_TABS, DiagnosisEngine, normalize_name
+
+logger = logging.getLogger(__name__)
+
+DATABASE_PATH = Path('data/diagnosis_data.db')
+ID_FIELDS = ('id', 'patient_id', 'bemor_id')
+TRUE_VALUES = {'1', '+', 'true', 'yes', 'ha'}
+
+Patient = Tuple[str, List[int]]
+
+# Har bir ishchi jarayonda bir marta o'rnatiladigan holat
+_worker_engine: Optional[DiagnosisEngine] = None
+_worker_top_k = 5
+
+
+def load_code_map(catalog_path: Path = CATALOG_PATH) -> Dict[str, str]:
+    """id_code -> simptom nomi xaritasi"""
+    with open(catalog_path, encoding='utf-8') as f:
+        catalog = json.load(f)
+    return {entry['id_code']: entry['name'] for tab in CATALOG_TABS for entry in catalog.get(tab, [])}
+
+
+def build_engine(db_path: Path, catalog_path: Path) -> DiagnosisEngine:
+    """Bilimlar bazasini bir marta kompilyatsiya qilish; baza bo'sh bo'lsa katalogdan"""
+    if db_path.exists():
+        conn = sqlite3.connect(db_path)
+        try:
+            engine = DiagnosisEngine.from_connection(conn)
+        finally:
+            conn.close()
+        if engine.shape[0] and engine.shape[1]:
+            return engine
+    return DiagnosisEngine.from_json(catalog_path)
+
+
+def is_present(value) -> bool:
+    if isinstance(value, str):
+        return value.strip().casefold() in TRUE_VALUES
+    return bool(value)
+
+
+def read_patients(path: Path, code_columns: Dict[str, int]) -> Iterator[Patient]:
+    """Kirish faylini oqim ko'rinishida o'qish: (bemor_id, [ustun indekslari])"""
+    with open(path, encoding='utf-8', newline='') as f:
+        records: Iterable[Dict] = (json.loads(line) for line in f if line.strip()) \
+            if path.suffix.lower() in ('.jsonl', '.ndjson') else csv.DictReader(f)
+        for n, record in enumerate(records, 1):
+            patient_id = next((str(record[k]) for k in ID_FIELDS if k in record), str(n))
+            columns = [code_columns[code] for code, value in record.items()
+                       if code in code_columns and is_present(value)]
+            yield patient_id, columns
+
+
+def chunked(iterable: Iterable, size: int) -> Iterator[list]:
+    it = iter(iterable)
+    while chunk := list(islice(it, size)):
+        yield chunk
+
+
+def _init_worker(disease_names: Sequence[str], symptom_names: Sequence[str],
+                 matrix: np.ndarray, top_k: int):
+    global _worker_engine, _worker_top_k
+    _worker_engine = DiagnosisEngine(disease_names, symptom_names, matrix)
+    _worker_top_k = top_k
+
+
+def score_chunk(chunk: List[Patient]) -> List[Dict]:
+    """Bir bo'lak bemorlarni bitta matritsa amali bilan tartiblash"""
+    engine = _worker_engine
+    queries = np.zeros((len(chunk), engine.shape[1]), dtype=np.float32)
+    for row, (_, columns) in enumerate(chunk):
+        queries[row, columns] = 1.0
+    ranked = engine.rank_matrix(queries, _worker_top_k)
+    return [{'id': patient_id, 'diagnoses': [dict(d._asdict(), score=round(d.score, 4)) for d in diagnoses]}
+            for (patient_id, _), diagnoses in zip(chunk, ranked)]
+
+
+def run_batch(patients: Iterable[Patient], engine: DiagnosisEngine, top_k: int = 5,
+              chunk_size: int = 2000, workers: Optional[int] = None) -> Iterator[Dict]:
+    """Bo'laklarni jarayonlar puliga taqsimlash, natijalarni kirish tartibida qaytarish"""
+    workers = workers or os.cpu_count() or 1
+    chunks = chunked(patients, chunk_size)
+    matrix = engine.by_symptom.T
+    if workers == 1:
+        _init_worker(engine.disease_names, engine.symptom_names, matrix, top_k)
+        for chunk in chunks:
+            yield from score_chunk(chunk)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(engine.disease_names, engine.symptom_names, matrix, top_k)) as executor:
+        # Xotira chegaralangan bo'lishi uchun bir vaqtda faqat bir nechta bo'lak navbatda turadi
+        pending = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(score_chunk, chunk))
+            if len(pending) >= workers * 2:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def write_results(results: Iterable[Dict], out, fmt: str) -> int:
+    count = 0
+    if fmt == 'csv':
+        writer = csv.writer(out)
+        writer.writerow(['id', 'rank', 'disease', 'score', 'matched'])
+        for result in results:
+            for rank, d in enumerate(result['diagnoses'], 1):
+                writer.writerow([result['id'], rank, d['disease'], f"{d['score']:.4f}", d['matched']])
+            if not result['diagnoses']:
+                # Mos simptomi yo'q bemor ham natijada bo'sh qator sifatida qoladi
+                writer.writerow([result['id'], '', '', '', ''])
+            count += 1
+    else:
+        for result in results:
+            out.write(json.dumps(result, ensure_ascii=False) + '\n')
+            count += 1
+    return count
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Bemorlarni ommaviy tashxislash")
+    parser.add_argument('input', type=Path, help="CSV yoki JSONL fayl (id_code ustunlari bilan)")
+    parser.add_argument('-o', '--output', type=Path, help="Natija fayli (.jsonl yoki .csv); berilmasa stdout")
+    parser.add_argument('--db', type=Path, default=DATABASE_PATH)
+    parser.add_argument('--catalog', type=Path, default=CATALOG_PATH)
+    parser.add_argument('--top-k', type=int, default=5)
+    parser.add_argument('--chunk-size', type=int, default=2000)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    engine = build_engine(args.db, args.catalog)
+    code_columns = {code: engine.symptom_index[normalize_name(name)]
+                    for code, name in load_code_map(args.catalog).items()
+                    if normalize_name(name) in engine.symptom_index}
+
+    fmt = 'csv' if args.output and args.output.suffix.lower() == '.csv' else 'jsonl'
+    results = run_batch(read_patients(args.input, code_columns), engine,
+                        args.top_k, args.chunk_size, args.workers)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8', newline='') as out:
+            count = write_results(results, out, fmt)
+    else:
+        count = write_results(results, sys.stdout, fmt)
+    logger.info("%d ta bemor tashxislandi", count)
+    return 0
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    sys.exit(main())
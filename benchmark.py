@@ -0,0 +1,189 @@
+"""Asosiy amallarni sun'iy bazalarda turli o'lchamlarda o'lchash.
+
+Har bir o'lcham uchun ``synthetic_kb`` bilan baza yaratiladi va quyidagilar
+o'lchanadi: to'liq nusxani o'qish (get_all_data), Excel eksporti, "Saqlash"
+oqimi, kaskadli o'chirish va tashxis so'rovlari. Natijalar JSON faylga
+yoziladi; ``--compare`` bilan oldingi natijalarga nisbatan farq ko'rsatiladi.
+
+    python benchmark.py --scales small medium -o bench.json
+    python benchmark.py -o new.json --compare bench.json
+"""
+import argparse
+import json
+import platform
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from itertools import count
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+
+from catalog import Catalog
+from database import cascade_delete, get_connection, load_knowledge_base, save_symptom_matrix
+from diagnosis_engine import DiagnosisEngine, InvertedIndex
+from excel_export import build_workbook, workbook_bytes
+from migrations import migrate
+from synthetic_kb import KnowledgeBaseSpec, build_database, generate_matrix
+
+SCALES = {
+    'small': KnowledgeBaseSpec(diseases=20, groups=5, symptoms=200, fill=0.1),
+    'medium': KnowledgeBaseSpec(diseases=100, groups=20, symptoms=1000, fill=0.05),
+    'large': KnowledgeBaseSpec(diseases=500, groups=40, symptoms=5000, fill=0.02),
+}
+DEFAULT_SCALES = ('small', 'medium')
+QUERY_SYMPTOMS = 5
+
+
+def measure(run: Callable[[], object], repeat: int, setup: Optional[Callable[[], object]] = None) -> Dict:
+    """``run`` ni ``repeat`` marta o'lchash; ``setup`` (masalan, bazadan nusxa) vaqtga kirmaydi"""
+    timings = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+    return {
+        'repeat': repeat,
+        'min': min(timings),
+        'median': statistics.median(timings),
+        'mean': statistics.fmean(timings),
+        'stdev': statistics.stdev(timings) if len(timings) > 1 else 0.0,
+    }
+
+
+def copy_database(source: Path, target: Path):
+    """WAL holatidagi bazadan ham to'g'ri nusxa olish uchun backup API"""
+    src, dst = sqlite3.connect(source), sqlite3.connect(target)
+    try:
+        src.backup(dst)
+    finally:
+        src.close()
+        dst.close()
+
+
+def bench_scale(name: str, spec: KnowledgeBaseSpec, workdir: Path, repeat: int) -> List[Dict]:
+    base = workdir / f"{name}.db"
+    build_database(base, spec)
+    with get_connection(base) as conn:
+        data = load_knowledge_base(conn)
+    diseases, groups, symptoms, values = data
+    results = []
+
+    def record(case: str, stats: Dict):
+        results.append({'scale': name, 'case': case, **stats})
+        print(f"{name:>8} {case:<22} median {stats['median'] * 1000:10.2f} ms", file=sys.stderr)
+
+    def read_all():
+        # Sahifalardagidek: bazadan o'qish va ixcham katalog qurish
+        with get_connection(base) as conn:
+            Catalog.from_rows(*load_knowledge_base(conn))
+
+    record('get_all_data', measure(read_all, repeat))
+    record('export_to_excel', measure(lambda: workbook_bytes(build_workbook(diseases, symptoms, values)),
+                                      max(1, repeat // 5)))
+
+    # Yozuvchi amallar har safar yangi faylda bajariladi: puldagi ulanishlar eski faylga bog'lanib qolmaydi
+    scratch_paths = (workdir / f"{name}_scratch_{i}.db" for i in count())
+    scratch = base
+    matrix = generate_matrix(spec)
+
+    def new_scratch(copy_from: Optional[Path] = None):
+        nonlocal scratch
+        scratch = next(scratch_paths)
+        if copy_from is not None:
+            copy_database(copy_from, scratch)
+
+    def bulk_save():
+        with get_connection(scratch) as conn:
+            migrate(conn)
+            save_symptom_matrix(conn, matrix)
+
+    record('save_bulk', measure(bulk_save, max(1, repeat // 5), setup=new_scratch))
+
+    def resave_unchanged():
+        with get_connection(base) as conn:
+            save_symptom_matrix(conn, matrix)
+
+    record('save_unchanged', measure(resave_unchanged, repeat))
+
+    rng = random.Random(spec.seed)
+
+    def delete_disease():
+        with get_connection(scratch) as conn:
+            cascade_delete(conn, 'diseases', 'id', rng.choice(diseases)[0])
+
+    record('delete_cascade', measure(delete_disease, repeat, setup=lambda: new_scratch(base)))
+
+    record('diagnosis_index_build', measure(lambda: InvertedIndex.from_rows(diseases, values), repeat))
+    index = InvertedIndex.from_rows(diseases, values)
+    engine = DiagnosisEngine.from_rows(diseases, values)
+    queries = [rng.sample(index.symptom_names, min(QUERY_SYMPTOMS, len(index.symptom_names)))
+               for _ in range(100)]
+
+    def run_queries(rank):
+        for query in queries:
+            rank(query, 5)
+
+    # 100 ta so'rov birga o'lchanadi: bitta so'rov taymer aniqligidan qisqa
+    record('diagnosis_index_x100', measure(lambda: run_queries(index.rank), repeat))
+    record('diagnosis_dense_x100', measure(lambda: run_queries(engine.rank), repeat))
+    return results
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current: Sequence[Dict], baseline: Sequence[Dict]):
+    """Median vaqtlar nisbati: 1 dan katta bo'lsa yangi versiya sekinroq"""
+    previous = {(r['scale'], r['case']): r for r in baseline}
+    for result in current:
+        old = previous.get((result['scale'], result['case']))
+        if old and old['median'] > 0:
+            ratio = result['median'] / old['median']
+            print(f"{result['scale']:>8} {result['case']:<22} {ratio:6.2f}x", file=sys.stderr)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Bilimlar bazasi amallarini o'lchash")
+    parser.add_argument('--scales', nargs='+', choices=SCALES, default=list(DEFAULT_SCALES))
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('-o', '--output', type=Path)
+    parser.add_argument('--compare', type=Path, help="oldingi natijalar JSON fayli")
+    args = parser.parse_args(argv)
+
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for name in args.scales:
+            results.extend(bench_scale(name, SCALES[name], Path(workdir), args.repeat))
+
+    report = {
+        'meta': {
+            'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'revision': _git_revision(),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform(),
+            'scales': {name: SCALES[name]._asdict() for name in args.scales},
+        },
+        'results': results,
+    }
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2), encoding='utf-8')
+    if args.compare:
+        compare(results, json.loads(args.compare.read_text(encoding='utf-8'))['results'])
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,240 @@
+"""Bilimlar bazasining xotiradagi ixcham modeli.
+
+``load_knowledge_base()`` qatorlarida kasallik, guruh va simptom nomlari
+har bir qiymat qatorida qayta-qayta takrorlanadi. Katalog esa har bir
+jadvalni id bo'yicha tartiblangan int32 ustunlar sifatida saqlaydi: nomlar
+umumiy ``NameTable`` da bir marta turadi, ustunlarda faqat ularning
+indeksi. JOIN orqali kelgan nom ustunlari umuman saqlanmaydi — ular
+o'qilayotganda ota jadvaldan topiladi.
+
+Sahifalar avvalgidek ``diseases, groups, symptoms, values = catalog``
+ko'rinishida ishlaydi: ``TableView`` qatorlarni faqat iteratsiya paytida
+``load_knowledge_base()`` dagi shakldagi tuple larga aylantiradi.
+"""
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple
+
+import numpy as np
+
+ID_DTYPE = np.int32
+
+# Katalog jadvallari tartibi (load_knowledge_base() natijasi bilan bir xil)
+TABLES = ('diseases', 'symptom_groups', 'symptoms', 'disease_symptoms')
+
+# Jadval -> saqlanadigan ustunlar: (qatordagi o'rni, nom ustunimi); qolganlari ota jadvaldan olinadi
+STORED_COLUMNS = {
+    'diseases': ((1, True),),
+    'symptom_groups': ((1, False), (2, True)),
+    'symptoms': ((1, False), (2, True)),
+    'disease_symptoms': ((1, False), (2, False), (3, False)),
+}
+
+# Nomlar jadvalidagi ishlatilmayotgan nomlar (o'zgartirilgan yoki o'chirilgan) uchun zaxira:
+# jadval 2 * (ishlatilayotganlar) + NAMES_SLACK dan oshsa qayta quriladi
+NAMES_SLACK = 1024
+
+
+class NameTable:
+    """Takrorlanuvchi nomlar bir marta saqlanadi, ustunlarda esa ularning int32 indeksi.
+
+    Faqat qo'shiladi: katalogning eski versiyalari ham shu jadvaldan
+    o'qiyveradi, chunki ular biladigan indekslar o'zgarmaydi. Eskirgan
+    nomlar ``Catalog.patch()`` da yangi jadvalga ko'chirish orqali tozalanadi.
+    """
+
+    __slots__ = ('names', '_index', 'live')
+
+    def __init__(self, names: Sequence[str] = ()):
+        self.names: List[str] = list(names)
+        self._index: Dict[str, int] = {name: code for code, name in enumerate(self.names)}
+        # Oxirgi tekshiruvda qatorlar ishlatayotgan nomlar soni
+        self.live = len(self.names)
+
+    def intern(self, names: Iterable[str]) -> np.ndarray:
+        index, table = self._index, self.names
+        codes = []
+        for name in names:
+            code = index.get(name)
+            if code is None:
+                code = index[name] = len(table)
+                table.append(name)
+            codes.append(code)
+        return np.array(codes, dtype=ID_DTYPE)
+
+    def lookup(self, codes: np.ndarray) -> List[str]:
+        names = self.names
+        return [names[code] for code in codes.tolist()]
+
+
+class Columns:
+    """Bitta jadval: id lar va saqlanadigan ustunlar, hammasi id bo'yicha tartiblangan massivlar"""
+
+    __slots__ = ('ids', 'columns')
+
+    def __init__(self, ids: np.ndarray, columns: Tuple[np.ndarray, ...]):
+        self.ids = ids
+        self.columns = columns
+
+    @classmethod
+    def build(cls, ids: np.ndarray, columns: Tuple[np.ndarray, ...]) -> 'Columns':
+        order = np.argsort(ids, kind='stable')
+        return cls(ids[order], tuple(column[order] for column in columns))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def find(self, ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """id lar o'rni va topilganlik niqobi (topilmaganlar o'rni ahamiyatsiz)"""
+        if not len(self.ids):
+            return np.zeros(len(ids), dtype=np.intp), np.zeros(len(ids), dtype=bool)
+        positions = np.minimum(np.searchsorted(self.ids, ids), len(self.ids) - 1)
+        return positions, self.ids[positions] == ids
+
+    def patch(self, ids: np.ndarray, columns: Tuple[np.ndarray, ...], deleted: Iterable[int]) -> 'Columns':
+        """Yangi jadval qaytarish: mavjud qatorlar joyida yangilanadi, yangilari qo'shiladi"""
+        positions, found = self.find(ids)
+        kept_ids = self.ids.copy()
+        kept = [column.copy() for column in self.columns]
+        for column, values in zip(kept, columns):
+            column[positions[found]] = values[found]
+
+        deleted = np.fromiter(deleted, dtype=ID_DTYPE)
+        if len(deleted):
+            keep = ~np.isin(kept_ids, deleted)
+            kept_ids = kept_ids[keep]
+            kept = [column[keep] for column in kept]
+
+        added = ~found
+        if not added.any():
+            return Columns(kept_ids, tuple(kept))
+        added_ids = ids[added]
+        merged_ids = np.concatenate((kept_ids, added_ids))
+        merged = tuple(np.concatenate((column, values[added])) for column, values in zip(kept, columns))
+        # load_rows() natijasi tartiblanmagan (JOIN guruh/kasallik tartibida qaytarishi mumkin):
+        # qo'shilganlar o'sish tartibida va mavjudlaridan keyin bo'lmasa, find() uchun qayta saralanadi
+        in_order = bool(np.all(added_ids[1:] > added_ids[:-1])) and (
+            not len(kept_ids) or added_ids[0] > kept_ids[-1])
+        if not in_order:
+            return Columns.build(merged_ids, merged)
+        return Columns(merged_ids, merged)
+
+
+class TableView:
+    """Katalog jadvalining faqat o'qish uchun qatorlar ko'rinishi (id tartibida).
+
+    Ota qatori topilmagan qatorlar (bazadagi JOIN kabi) iteratsiyada tashlab ketiladi.
+    """
+
+    __slots__ = ('catalog', 'table')
+
+    def __init__(self, catalog: 'Catalog', table: str):
+        self.catalog = catalog
+        self.table = table
+
+    def __iter__(self) -> Iterator[tuple]:
+        return iter(self.catalog.rows(self.table))
+
+    def __len__(self) -> int:
+        return len(self.catalog.tables[self.table])
+
+
+class Catalog:
+    """To'rt jadvalning ixcham, o'zgarmas nusxasi; ``patch()`` yangi nusxa qaytaradi"""
+
+    __slots__ = ('names', 'tables')
+
+    def __init__(self, names: NameTable, tables: Dict[str, Columns]):
+        self.names = names
+        self.tables = tables
+
+    @classmethod
+    def from_rows(cls, *tables: Sequence[tuple]) -> 'Catalog':
+        """``load_knowledge_base()`` natijasidan katalog qurish"""
+        catalog = cls(NameTable(), {})
+        for table, rows in zip(TABLES, tables):
+            catalog.tables[table] = Columns.build(*catalog._encode(table, rows))
+        catalog.names.live = len(catalog.names.names)
+        return catalog
+
+    def _encode(self, table: str, rows: Sequence[tuple]) -> Tuple[np.ndarray, Tuple[np.ndarray, ...]]:
+        rows = list(rows)
+        ids = np.array([row[0] for row in rows], dtype=ID_DTYPE)
+        columns = tuple(
+            self.names.intern(row[i] for row in rows) if is_name
+            else np.array([row[i] for row in rows], dtype=ID_DTYPE)
+            for i, is_name in STORED_COLUMNS[table])
+        return ids, columns
+
+    def patch(self, changes: Dict[str, Tuple[Sequence[tuple], Iterable[int]]]) -> 'Catalog':
+        """jadval -> (qayta o'qilgan qatorlar, o'chirilgan id lar); o'zgarmagan jadvallar umumiy qoladi"""
+        tables = dict(self.tables)
+        for table, (rows, deleted) in changes.items():
+            tables[table] = tables[table].patch(*self._encode(table, rows), deleted)
+        catalog = Catalog(self.names, tables)
+        if len(self.names.names) > 2 * self.names.live + NAMES_SLACK:
+            catalog = catalog._compact()
+        return catalog
+
+    def _compact(self) -> 'Catalog':
+        """Faqat qatorlar ishlatayotgan nomlardan iborat yangi nomlar jadvali bilan nusxa"""
+        name_columns = {table: [k for k, (_, is_name) in enumerate(spec) if is_name]
+                        for table, spec in STORED_COLUMNS.items()}
+        used = np.unique(np.concatenate([self.tables[table].columns[k]
+                                         for table, positions in name_columns.items() for k in positions]))
+        if 2 * len(used) >= len(self.names.names):
+            # Jadval haqiqatan o'sgan: keyingi tekshiruv u yana ikki baravar kattalashganda
+            self.names.live = len(used)
+            return self
+
+        names = NameTable(self.names.lookup(used))
+        remap = np.zeros(len(self.names.names), dtype=ID_DTYPE)
+        remap[used] = np.arange(len(used), dtype=ID_DTYPE)
+        tables = {}
+        for table, columns in self.tables.items():
+            positions = name_columns[table]
+            tables[table] = Columns(columns.ids, tuple(remap[column] if k in positions else column
+                                                       for k, column in enumerate(columns.columns)))
+        return Catalog(names, tables)
+
+    def __getitem__(self, index: int) -> TableView:
+        return TableView(self, TABLES[index])
+
+    def __iter__(self) -> Iterator[TableView]:
+        return (TableView(self, table) for table in TABLES)
+
+    def _parent(self, table: str, ids: np.ndarray) -> Tuple[Tuple[np.ndarray, ...], np.ndarray]:
+        """Ota jadvaldagi qatorlar ustunlari va topilganlik niqobi"""
+        parent = self.tables[table]
+        positions, found = parent.find(ids)
+        if not len(parent):
+            return tuple(np.zeros(len(ids), dtype=ID_DTYPE) for _ in parent.columns), found
+        return tuple(column[positions] for column in parent.columns), found
+
+    def rows(self, table: str) -> List[tuple]:
+        """Jadval qatorlari ``load_knowledge_base()`` shaklida, id tartibida"""
+        columns = self.tables[table]
+        ids, stored = columns.ids, columns.columns
+        lookup = self.names.lookup
+
+        if table == 'diseases':
+            return list(zip(ids.tolist(), lookup(stored[0])))
+
+        if table == 'symptom_groups':
+            disease_id, group_name = stored
+            (disease_name,), found = self._parent('diseases', disease_id)
+            return list(zip(ids[found].tolist(), disease_id[found].tolist(),
+                            lookup(group_name[found]), lookup(disease_name[found])))
+
+        if table == 'symptoms':
+            group_id, symptom_name = stored
+            (_, group_name), found = self._parent('symptom_groups', group_id)
+            return list(zip(ids[found].tolist(), group_id[found].tolist(),
+                            lookup(symptom_name[found]), lookup(group_name[found])))
+
+        disease_id, symptom_id, value = stored
+        (disease_name,), disease_found = self._parent('diseases', disease_id)
+        (group_id, symptom_name), symptom_found = self._parent('symptoms', symptom_id)
+        (_, group_name), group_found = self._parent('symptom_groups', group_id)
+        found = disease_found & symptom_found & group_found
+        return list(zip(ids[found].tolist(), disease_id[found].tolist(), symptom_id[found].tolist(),
+                        value[found].tolist(), lookup(disease_name[found]), lookup(symptom_name[found]),
+                        lookup(group_name[found])))
@@ -0,0 +1,71 @@
+"""symptoms.json katalogini diagnosis_data.db ga ommaviy yuklash.
+
+Har bir ``illnesses`` yozuvi kasallik bo'ladi, simptomlar katalogdagi
+``category`` bo'yicha guruhlanadi, "+" qiymati 1, "-" esa 0 sifatida
+saqlanadi. Yuklash idempotent: qayta ishga tushirilganda faqat o'zgargan
+qiymatlar yoziladi.
+
+    python catalog_import.py --catalog symptoms.json
+"""
+import argparse
+import json
+import logging
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+from database import DATABASE_PATH, SaveReport, get_connection, save_symptom_matrix
+from diagnosis_engine import CATALOG_PATH, CATALOG_TABS, catalog_key
+from migrations import migrate
+
+logger = logging.getLogger(__name__)
+
+# Katalogda topilmagan simptomlar uchun guruh
+FALLBACK_CATEGORY = 'other'
+
+
+def load_catalog(path: Path = CATALOG_PATH) -> Dict:
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def catalog_matrix(catalog: Dict) -> List[list]:
+    """Katalogni "Saqlash" oqimidagi [kasallik, guruh, simptom, qiymat] qatorlariga aylantirish"""
+    entries = {catalog_key(entry['name']): entry for tab in CATALOG_TABS for entry in catalog.get(tab, [])}
+    matrix = []
+    for illness in catalog.get('illnesses', []):
+        for name, sign in illness['symptoms'].items():
+            entry = entries.get(catalog_key(name))
+            if entry is None:
+                matrix.append([illness['name'], FALLBACK_CATEGORY, name.strip(), 1 if sign == '+' else 0])
+            else:
+                matrix.append([illness['name'], entry['category'], entry['name'], 1 if sign == '+' else 0])
+    return matrix
+
+
+def import_catalog(conn, catalog: Dict) -> SaveReport:
+    """Katalogni bitta tranzaksiyada yuklash va nima o'zgarganini qaytarish"""
+    return save_symptom_matrix(conn, catalog_matrix(catalog))
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="symptoms.json katalogini bazaga yuklash")
+    parser.add_argument('--catalog', type=Path, default=CATALOG_PATH)
+    parser.add_argument('--db', type=Path, default=DATABASE_PATH)
+    args = parser.parse_args(argv)
+
+    catalog = load_catalog(args.catalog)
+    with get_connection(args.db) as conn:
+        migrate(conn)
+        report = import_catalog(conn, catalog)
+
+    for field, count in report._asdict().items():
+        logger.info("%s: %d", field, count)
+    if not report.changed:
+        logger.info("Katalog o'zgarmagan, bazaga hech narsa yozilmadi")
+    return 0
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    sys.exit(main())
@@ -0,0 +1,76 @@
+"""Boshqa jarayonlar bazaga yozganini aniqlash (bir nechta Streamlit ishchisi).
+
+Har bir jarayonda baza uchun alohida, puldan tashqari ulanish ochiladi va
+``PRAGMA data_version`` so'raladi: qiymat faqat boshqa ulanishlar commit
+qilganda o'zgaradi va fayl o'qilmaydi, shuning uchun tekshiruv deyarli bepul.
+O'zgargan bo'lsa, triggerlar yuritadigan ``kb_version`` hisoblagichi
+keshdagi nusxaniki bilan solishtiriladi: jarayonning o'z yozuvlari
+``kb_cache.apply()`` orqali allaqachon hisobga olingan, shuning uchun kesh
+faqat boshqa yozuvchi haqiqatan o'zgartirganda eskirgan deb belgilanadi.
+"""
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+from database import DATABASE_PATH, read_kb_version
+from kb_cache import KnowledgeBaseCache, kb_cache
+
+logger = logging.getLogger(__name__)
+
+# Qayta ishga tushirishlar orasida bazaga bundan tez-tez murojaat qilinmaydi
+POLL_INTERVAL = 1.0
+
+
+class ChangeNotifier:
+    def __init__(self, db_path: Path, cache: KnowledgeBaseCache, interval: float = POLL_INTERVAL):
+        self.db_path = Path(db_path)
+        self.cache = cache
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._data_version: Optional[int] = None
+        self._next_poll = 0.0
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            # data_version ulanishga bog'liq: u doim bitta, uzoq yashaydigan ulanishda so'raladi
+            self._conn = sqlite3.connect(self.db_path, timeout=10, check_same_thread=False)
+        return self._conn
+
+    def poll(self) -> bool:
+        """Boshqa yozuvchi o'zgartirgan bo'lsa keshni eskirgan deb belgilash; belgilangan bo'lsa True"""
+        now = time.monotonic()
+        if now < self._next_poll:
+            return False
+        # Boshqa oqim allaqachon tekshirayotgan bo'lsa kutib o'tirilmaydi
+        if not self._lock.acquire(blocking=False):
+            return False
+        try:
+            self._next_poll = now + self.interval
+            conn = self._connection()
+            data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+            if data_version == self._data_version:
+                return False
+            self._data_version = data_version
+            db_version = read_kb_version(conn)
+        except sqlite3.Error:
+            logger.exception("Bazadagi o'zgarishlarni tekshirib bo'lmadi")
+            return False
+        finally:
+            self._lock.release()
+        return self.cache.sync(db_version)
+
+
+_notifiers: Dict[Path, ChangeNotifier] = {}
+_notifiers_lock = threading.Lock()
+
+
+def get_change_notifier(db_path: Path = DATABASE_PATH, cache: KnowledgeBaseCache = kb_cache) -> ChangeNotifier:
+    db_path = Path(db_path)
+    with _notifiers_lock:
+        if db_path not in _notifiers:
+            _notifiers[db_path] = ChangeNotifier(db_path, cache)
+        return _notifiers[db_path]
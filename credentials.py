@@ -0,0 +1,195 @@
+"""Foydalanuvchilar (DOCTORS / ADMINS) jadvallari uchun parollarni xeshlash va tekshirish.
+
+Parollar bcrypt bilan xeshlanadi, har bir qatorda uning xesh narxi (cost)
+ham saqlanadi: ``BCRYPT_ROUNDS`` oshirilsa, eski qatorlar keyingi
+muvaffaqiyatli kirishda qayta xeshlanadi. LOGIN ustuni noyob va indekslangan.
+
+bcrypt ataylab sekin, shuning uchun muvaffaqiyatli tekshiruvlar natijasi
+chegaralangan keshda saqlanadi. Kesh kaliti parolning o'zi emas, jarayon
+uchun tasodifiy kalit bilan olingan HMAC bo'lib, unga saqlangan xesh ham
+kiradi: parol o'zgarsa eski yozuv o'z-o'zidan ishlamay qoladi.
+"""
+import hashlib
+import hmac
+import logging
+import secrets
+import sqlite3
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+from typing import NamedTuple, Optional, Set, Tuple
+
+import bcrypt
+
+from database import get_pool
+
+logger = logging.getLogger(__name__)
+
+BCRYPT_ROUNDS = 12
+VERIFY_CACHE_SIZE = 1024
+CREDENTIALS_SCHEMA_VERSION = 1
+
+
+class UserRecord(NamedTuple):
+    id: int
+    login: str
+
+
+def password_cost(password_hash: str) -> int:
+    """``$2b$12$...`` ko'rinishidagi xeshdan narxni olish"""
+    return int(password_hash.split('$')[2])
+
+
+def hash_password(password: str, rounds: int = BCRYPT_ROUNDS) -> Tuple[str, int]:
+    hashed = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=rounds)).decode('ascii')
+    return hashed, rounds
+
+
+def _is_bcrypt_hash(value: str) -> bool:
+    return value.startswith(('$2a$', '$2b$', '$2y$')) and len(value) == 60
+
+
+class VerificationCache:
+    """Muvaffaqiyatli (xesh, parol) tekshiruvlarining chegaralangan LRU keshi"""
+
+    def __init__(self, size: int = VERIFY_CACHE_SIZE):
+        self.size = size
+        self._key = secrets.token_bytes(32)
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[bytes, None]" = OrderedDict()
+
+    def _digest(self, password_hash: str, password: str) -> bytes:
+        message = password_hash.encode('ascii') + b'\0' + password.encode('utf-8')
+        return hmac.new(self._key, message, hashlib.sha256).digest()
+
+    def verify(self, password_hash: str, password: str) -> bool:
+        digest = self._digest(password_hash, password)
+        with self._lock:
+            if digest in self._entries:
+                self._entries.move_to_end(digest)
+                return True
+        if not bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('ascii')):
+            return False
+        with self._lock:
+            self._entries[digest] = None
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+        return True
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+verification_cache = VerificationCache()
+
+
+@lru_cache(maxsize=1)
+def _dummy_hash() -> bytes:
+    # Mavjud bo'lmagan login uchun ham bcrypt ishlaydi: javob vaqti loginning bor-yo'qligini oshkor qilmaydi
+    return hash_password(secrets.token_hex(16))[0].encode('ascii')
+
+
+def _check_table(table: str):
+    if not table.isidentifier():
+        raise ValueError(f"Noma'lum jadval: {table}")
+
+
+def migrate_credentials(conn: sqlite3.Connection, table: str) -> int:
+    """Jadvalni noyob LOGIN, bcrypt xeshlari va COST ustuniga o'tkazish; versiyani qaytaradi"""
+    _check_table(table)
+    if conn.execute("PRAGMA user_version").fetchone()[0] >= CREDENTIALS_SCHEMA_VERSION:
+        return CREDENTIALS_SCHEMA_VERSION
+
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        # Boshqa jarayon shu orada migratsiyani bajargan bo'lishi mumkin
+        if conn.execute("PRAGMA user_version").fetchone()[0] >= CREDENTIALS_SCHEMA_VERSION:
+            conn.commit()
+            return CREDENTIALS_SCHEMA_VERSION
+
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                ID INTEGER PRIMARY KEY,
+                LOGIN TEXT NOT NULL,
+                PAROL TEXT NOT NULL
+            )
+        """)
+        rows = conn.execute(f"SELECT ID, LOGIN, PAROL FROM {table} ORDER BY ID").fetchall()
+        conn.execute(f"""
+            CREATE TABLE {table}_new (
+                ID INTEGER PRIMARY KEY,
+                LOGIN TEXT NOT NULL UNIQUE,
+                PAROL TEXT NOT NULL,
+                COST INTEGER NOT NULL
+            )
+        """)
+        seen = set()
+        migrated = []
+        for user_id, login, password in rows:
+            # Takroriy loginlardan birinchisi qoldiriladi
+            if login in seen:
+                logger.warning("%s jadvalida takroriy login o'tkazib yuborildi: id=%s", table, user_id)
+                continue
+            seen.add(login)
+            if _is_bcrypt_hash(password):
+                migrated.append((user_id, login, password, password_cost(password)))
+            else:
+                migrated.append((user_id, login, *hash_password(password)))
+        conn.executemany(f"INSERT INTO {table}_new (ID, LOGIN, PAROL, COST) VALUES (?, ?, ?, ?)", migrated)
+        conn.execute(f"DROP TABLE {table}")
+        conn.execute(f"ALTER TABLE {table}_new RENAME TO {table}")
+        conn.execute(f"PRAGMA user_version = {CREDENTIALS_SCHEMA_VERSION}")
+        conn.commit()
+    except sqlite3.Error:
+        conn.rollback()
+        logger.exception("%s jadvalini migratsiya qilib bo'lmadi", table)
+        raise
+    logger.info("%s jadvalidagi %d ta parol bcrypt ga o'tkazildi", table, len(migrated))
+    return CREDENTIALS_SCHEMA_VERSION
+
+
+_ready: Set[Tuple[Path, str]] = set()
+_ready_lock = threading.Lock()
+
+
+def ensure_credentials(db_path: Path, table: str):
+    """Migratsiyani jarayon davomida har bir baza uchun bir marta tekshirish"""
+    key = (Path(db_path), table)
+    if key in _ready:
+        return
+    with _ready_lock:
+        if key not in _ready:
+            with get_pool(db_path).connection() as conn:
+                migrate_credentials(conn, table)
+            _ready.add(key)
+
+
+def authenticate(conn: sqlite3.Connection, table: str, login: str, password: str) -> Optional[UserRecord]:
+    """Login (noyob indeks orqali) va parolni tekshirish"""
+    _check_table(table)
+    row = conn.execute(f"SELECT ID, LOGIN, PAROL, COST FROM {table} WHERE LOGIN = ?", (login,)).fetchone()
+    if row is None:
+        bcrypt.checkpw(password.encode('utf-8'), _dummy_hash())
+        return None
+
+    user_id, user_login, password_hash, cost = row
+    if not verification_cache.verify(password_hash, password):
+        return None
+
+    if cost < BCRYPT_ROUNDS:
+        # Narx oshirilgan: parol ochiq holda faqat hozir ma'lum, shuning uchun shu yerda qayta xeshlanadi
+        with conn:
+            conn.execute(f"UPDATE {table} SET PAROL = ?, COST = ? WHERE ID = ?",
+                         (*hash_password(password), user_id))
+    return UserRecord(user_id, user_login)
+
+
+def create_user(conn: sqlite3.Connection, table: str, login: str, password: str) -> int:
+    """Yangi foydalanuvchi qo'shish; login band bo'lsa sqlite3.IntegrityError"""
+    _check_table(table)
+    with conn:
+        cursor = conn.execute(f"INSERT INTO {table} (LOGIN, PAROL, COST) VALUES (?, ?, ?)",
+                              (login, *hash_password(password)))
+    return cursor.lastrowid
@@ -0,0 +1,467 @@
+import queue
+import sqlite3
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+from query_stats import InstrumentedConnection
+
+DATABASE_PATH = Path('data/diagnosis_data.db')
+
+# Bilimlar bazasi jadvallaridagi har bir o'zgarishda triggerlar oshiradigan hisoblagich (migratsiya 3)
+KB_VERSION_SQL = "SELECT version FROM kb_version WHERE id = 1"
+
+UPSERT_VALUE_SQL = """
+    INSERT INTO disease_symptoms (disease_id, symptom_id, value) VALUES (?, ?, ?)
+    ON CONFLICT(disease_id, symptom_id) DO UPDATE SET value = excluded.value
+"""
+
+# SQLite parametrlari soni chegarasidan oshmaslik uchun
+IN_CHUNK_SIZE = 500
+
+# Har bir ulanish uchun bir marta o'rnatiladigan sozlamalar
+POOL_SIZE = 8
+CACHED_STATEMENTS = 256
+CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-16000",
+    "PRAGMA mmap_size=67108864",
+    "PRAGMA foreign_keys=ON",
+    "PRAGMA temp_store=MEMORY",
+)
+
+
+class ConnectionPool:
+    """Bitta ma'lumotlar bazasi fayli uchun qayta ishlatiladigan ulanishlar puli.
+
+    Streamlit har bir qayta ishga tushirishni yangi oqimda bajaradi, shuning
+    uchun ulanishlar oqimga bog'lanmaydi: ular navbatdan olinadi, ishlatib
+    bo'lingach qaytariladi va bir vaqtning o'zida faqat bitta oqimga tegishli bo'ladi.
+    """
+
+    def __init__(self, db_path: Path, size: int = POOL_SIZE):
+        self.db_path = Path(db_path)
+        self._idle: queue.LifoQueue = queue.LifoQueue(maxsize=size)
+
+    def _connect(self) -> sqlite3.Connection:
+        # Har bir so'rov vaqti query_stats ga yoziladi (admin diagnostika paneli uchun)
+        conn = sqlite3.connect(self.db_path, timeout=10, check_same_thread=False,
+                               cached_statements=CACHED_STATEMENTS, factory=InstrumentedConnection)
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def acquire(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            return self._connect()
+
+    def release(self, conn: sqlite3.Connection):
+        # Yakunlanmagan tranzaksiya keyingi foydalanuvchiga o'tib ketmasligi kerak
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            conn.close()
+            return
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+
+_pools: Dict[Path, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path: Path = DATABASE_PATH) -> ConnectionPool:
+    db_path = Path(db_path)
+    with _pools_lock:
+        if db_path not in _pools:
+            _pools[db_path] = ConnectionPool(db_path)
+        return _pools[db_path]
+
+
+@contextmanager
+def get_connection(db_path: Path = DATABASE_PATH):
+    """Puldan ulanish olish (WAL rejimi, o'quvchilar yozuvchini kutmaydi)"""
+    with get_pool(db_path).connection() as conn:
+        yield conn
+
+
+def select_in(conn: sqlite3.Connection, sql: str, keys: Sequence) -> List[tuple]:
+    """``sql`` ichidagi {marks} o'rniga bo'laklab IN (?, ?, ...) qo'yib bajarish"""
+    rows = []
+    keys = list(keys)
+    for start in range(0, len(keys), IN_CHUNK_SIZE):
+        chunk = keys[start:start + IN_CHUNK_SIZE]
+        marks = ', '.join('?' * len(chunk))
+        rows.extend(conn.execute(sql.format(marks=marks), chunk).fetchall())
+    return rows
+
+
+# Keyset sahifalash: OFFSET o'rniga oxirgi ko'rsatilgan id dan keyingi qatorlar olinadi,
+# shuning uchun har bir sahifa jadval hajmidan qat'i nazar bir xil tez o'qiladi
+PAGE_SIZE = 50
+# Jadval -> (load_knowledge_base() qatorlari bilan bir xil ustunlar, id ustuni, qidiriladigan nom ustunlari)
+TABLE_SELECTS = {
+    'diseases': (
+        "SELECT d.id, d.name FROM diseases d",
+        'd.id', ('d.name',),
+    ),
+    'symptom_groups': (
+        """SELECT sg.id, sg.disease_id, sg.group_name, d.name
+           FROM symptom_groups sg JOIN diseases d ON sg.disease_id = d.id""",
+        'sg.id', ('sg.group_name', 'd.name'),
+    ),
+    'symptoms': (
+        """SELECT s.id, s.group_id, s.symptom_name, sg.group_name
+           FROM symptoms s JOIN symptom_groups sg ON s.group_id = sg.id""",
+        's.id', ('s.symptom_name', 'sg.group_name'),
+    ),
+    # Triggerlar yuritadigan kb_matrix (migratsiya 4): nomlar allaqachon qatorda, JOIN kerak emas
+    'disease_symptoms': (
+        """SELECT m.id, m.disease_id, m.symptom_id, m.value, m.disease_name, m.symptom_name, m.group_name
+           FROM kb_matrix m""",
+        'm.id', ('m.disease_name', 'm.symptom_name', 'm.group_name'),
+    ),
+}
+
+
+def _casefold(value):
+    return None if value is None else str(value).casefold()
+
+
+def fetch_page(conn: sqlite3.Connection, table: str, after_id: int = 0,
+               limit: int = PAGE_SIZE, search: str = '') -> Tuple[List[tuple], bool]:
+    """``after_id`` dan keyingi ``limit`` ta qator va undan keyin yana sahifa bor-yo'qligi.
+
+    ``search`` berilsa, faqat nom ustunlarida shu matn uchragan qatorlar qaytariladi.
+    Solishtirish ``str.casefold()`` bilan bajariladi: SQLite ``LIKE`` faqat ASCII
+    harflarda katta-kichiklikni farqlamaydi, nomlar esa kirillchada.
+    """
+    if table not in TABLE_SELECTS:
+        raise ValueError(f"Noma'lum jadval: {table}")
+
+    select, key, columns = TABLE_SELECTS[table]
+    conditions = [f"{key} > :after"]
+    params = {'after': after_id, 'limit': limit + 1}
+    if search:
+        conn.create_function('casefold', 1, _casefold, deterministic=True)
+        params['needle'] = search.casefold()
+        conditions.append('(' + ' OR '.join(f"instr(casefold({column}), :needle) > 0" for column in columns) + ')')
+    rows = conn.execute(f"{select} WHERE {' AND '.join(conditions)} ORDER BY {key} LIMIT :limit",
+                        params).fetchall()
+    return rows[:limit], len(rows) > limit
+
+
+class Delta:
+    """Yozuv amali natijasi: keshdagi nusxada qaysi qatorlar qayta o'qilishi yoki olib tashlanishi kerak"""
+
+    __slots__ = ('upserted', 'deleted', 'since', 'until')
+
+    def __init__(self):
+        self.upserted: Dict[str, Set[int]] = defaultdict(set)
+        self.deleted: Dict[str, Set[int]] = defaultdict(set)
+        # Tranzaksiya boshidagi va oxiridagi kb_version: oraliqda boshqa yozuvchi bo'lmaganini tekshirish uchun
+        self.since: Optional[int] = None
+        self.until: Optional[int] = None
+
+    def upsert(self, table: str, ids: Iterable[int]):
+        self.upserted[table].update(ids)
+
+    def delete(self, table: str, ids: Iterable[int]):
+        ids = set(ids)
+        self.deleted[table].update(ids)
+        self.upserted[table].difference_update(ids)
+
+    def __bool__(self):
+        return any(self.upserted.values()) or any(self.deleted.values())
+
+
+def read_kb_version(conn: sqlite3.Connection) -> int:
+    return conn.execute(KB_VERSION_SQL).fetchone()[0]
+
+
+@contextmanager
+def write_transaction(conn: sqlite3.Connection, delta: Optional[Delta] = None):
+    """``with conn:`` o'rniga: yozuv qulfi darhol olinadi va ``delta`` ga kb_version oralig'i yoziladi.
+
+    Qulf ushlab turilgani uchun ``since`` dan ``until`` gacha bo'lgan barcha
+    o'zgarishlar shu tranzaksiyaniki; kesh shu orqali boshqa jarayon yozuvlarini farqlaydi.
+    """
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        if delta is not None:
+            delta.since = read_kb_version(conn)
+        yield conn
+        if delta is not None:
+            delta.until = read_kb_version(conn)
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+
+
+def load_rows(conn: sqlite3.Connection, table: str, ids: Iterable[int]) -> List[tuple]:
+    """Berilgan id lar bo'yicha qatorlar, load_knowledge_base() dagi ko'rinishda"""
+    select, key, _ = TABLE_SELECTS[table]
+    return select_in(conn, f"{select} WHERE {key} IN ({{marks}})", ids)
+
+
+def load_knowledge_base(conn: sqlite3.Connection) -> Tuple[List[tuple], List[tuple], List[tuple], List[tuple]]:
+    """Sahifalar keshlaydigan to'liq nusxa: (kasalliklar, guruhlar, simptomlar, qiymatlar)"""
+    cursor = conn.cursor()
+
+    # Kasalliklarni olish
+    diseases = cursor.execute("SELECT id, name FROM diseases").fetchall()
+
+    # Simptom guruhlarini olish
+    groups = cursor.execute("""
+        SELECT sg.id, sg.disease_id, sg.group_name, d.name as disease_name
+        FROM symptom_groups sg
+        JOIN diseases d ON sg.disease_id = d.id
+    """).fetchall()
+
+    # Simptomlarni olish
+    symptoms = cursor.execute("""
+        SELECT s.id, s.group_id, s.symptom_name, sg.group_name
+        FROM symptoms s
+        JOIN symptom_groups sg ON s.group_id = sg.id
+        ORDER BY s.id
+    """).fetchall()
+
+    # Qiymatlarni olish (kb_matrix ni bitta ketma-ket skan qilish)
+    values = cursor.execute("""
+        SELECT id, disease_id, symptom_id, value, disease_name, symptom_name, group_name
+        FROM kb_matrix
+    """).fetchall()
+
+    return diseases, groups, symptoms, values
+
+
+def load_snapshot(conn: sqlite3.Connection) -> Tuple[int, Tuple[List[tuple], ...]]:
+    """(kb_version, load_knowledge_base()) — hammasi bitta o'qish tranzaksiyasida, bir-biriga mos"""
+    conn.execute("BEGIN")
+    try:
+        return read_kb_version(conn), load_knowledge_base(conn)
+    finally:
+        conn.rollback()
+
+
+def _resolve_diseases(conn, names: Iterable[str]) -> Tuple[Dict[str, int], List[int]]:
+    names = set(names)
+    sql = "SELECT name, id FROM diseases WHERE name IN ({marks})"
+    ids = dict(select_in(conn, sql, names))
+    missing = [(name,) for name in names if name not in ids]
+    if missing:
+        conn.executemany("INSERT INTO diseases (name) VALUES (?)", missing)
+        ids.update(select_in(conn, sql, [m[0] for m in missing]))
+    return ids, [ids[m[0]] for m in missing]
+
+
+def _resolve_groups(conn, keys: Iterable[Tuple[int, str]]) -> Tuple[Dict[Tuple[int, str], int], List[int]]:
+    keys = set(keys)
+    sql = "SELECT disease_id, group_name, id FROM symptom_groups WHERE disease_id IN ({marks})"
+    disease_ids = {k[0] for k in keys}
+    ids = {(d, g): i for d, g, i in select_in(conn, sql, disease_ids)}
+    missing = [k for k in keys if k not in ids]
+    if missing:
+        conn.executemany("INSERT INTO symptom_groups (disease_id, group_name) VALUES (?, ?)", missing)
+        ids.update({(d, g): i for d, g, i in select_in(conn, sql, {m[0] for m in missing})})
+    return ids, [ids[m] for m in missing]
+
+
+def _resolve_symptoms(conn, keys: Iterable[Tuple[int, str]]) -> Tuple[Dict[Tuple[int, str], int], List[int]]:
+    keys = set(keys)
+    sql = "SELECT group_id, symptom_name, id FROM symptoms WHERE group_id IN ({marks})"
+    group_ids = {k[0] for k in keys}
+    ids = {(g, s): i for g, s, i in select_in(conn, sql, group_ids)}
+    missing = [k for k in keys if k not in ids]
+    if missing:
+        conn.executemany("INSERT INTO symptoms (group_id, symptom_name) VALUES (?, ?)", missing)
+        ids.update({(g, s): i for g, s, i in select_in(conn, sql, {m[0] for m in missing})})
+    return ids, [ids[m] for m in missing]
+
+
+# Bog'liq yozuvlar to'plam ko'rinishida o'chiriladi: (jadval, shart), {target} o'chirilayotgan qatorlar id lari
+CASCADE_DELETES = {
+    'diseases': (
+        ('disease_symptoms', "disease_id IN ({target})"),
+        ('disease_symptoms', """symptom_id IN (
+             SELECT s.id FROM symptoms s JOIN symptom_groups sg ON s.group_id = sg.id
+             WHERE sg.disease_id IN ({target}))"""),
+        ('symptoms', "group_id IN (SELECT id FROM symptom_groups WHERE disease_id IN ({target}))"),
+        ('symptom_groups', "disease_id IN ({target})"),
+    ),
+    'symptom_groups': (
+        ('disease_symptoms', "symptom_id IN (SELECT id FROM symptoms WHERE group_id IN ({target}))"),
+        ('symptoms', "group_id IN ({target})"),
+    ),
+    'symptoms': (
+        ('disease_symptoms', "symptom_id IN ({target})"),
+    ),
+    'disease_symptoms': (),
+}
+
+# Nom o'zgarganda qaysi qatorlardagi nusxalangan nomlar ham yangilanishi kerak: {ids} o'zgargan qatorlar
+DEPENDENT_ROWS = {
+    'diseases': (
+        ('symptom_groups', "disease_id IN ({ids})"),
+        ('disease_symptoms', "disease_id IN ({ids})"),
+    ),
+    'symptom_groups': (
+        ('symptoms', "group_id IN ({ids})"),
+        ('disease_symptoms', "symptom_id IN (SELECT id FROM symptoms WHERE group_id IN ({ids}))"),
+    ),
+    'symptoms': (
+        ('disease_symptoms', "symptom_id IN ({ids})"),
+    ),
+    'disease_symptoms': (),
+}
+
+
+def _check_identifiers(table: str, *fields: str):
+    if table not in CASCADE_DELETES or not all(field.isidentifier() for field in fields):
+        raise ValueError(f"Noma'lum jadval yoki ustun: {table}.{', '.join(fields)}")
+
+
+def cascade_delete(conn: sqlite3.Connection, table: str, condition_field: str, condition_value,
+                   delta: Optional[Delta] = None) -> int:
+    """Qatorni unga bog'liq barcha yozuvlar bilan birga bitta tranzaksiyada o'chirish.
+
+    O'chirilayotgan ma'lumot hajmidan qat'i nazar so'rovlar soni o'zgarmas.
+    Asosiy jadvaldan o'chirilgan qatorlar sonini qaytaradi; ``delta`` berilsa,
+    o'chirilgan barcha qatorlar id lari unga yoziladi.
+    """
+    _check_identifiers(table, condition_field)
+
+    target = f"SELECT id FROM {table} WHERE {condition_field} = :value"
+    params = {'value': condition_value}
+    with write_transaction(conn, delta):
+        for child, condition in CASCADE_DELETES[table]:
+            condition = condition.format(target=target)
+            if delta is not None:
+                delta.delete(child, (row[0] for row in conn.execute(f"SELECT id FROM {child} WHERE {condition}", params)))
+            conn.execute(f"DELETE FROM {child} WHERE {condition}", params)
+        if delta is not None:
+            delta.delete(table, (row[0] for row in conn.execute(target, params)))
+        return conn.execute(f"DELETE FROM {table} WHERE {condition_field} = :value", params).rowcount
+
+
+def update_field(conn: sqlite3.Connection, table: str, field: str, value, condition_field: str,
+                 condition_value, delta: Optional[Delta] = None) -> int:
+    """Bitta ustunni yangilash; ``delta`` ga o'zgargan va nomi nusxalangan bog'liq qatorlar yoziladi"""
+    _check_identifiers(table, field, condition_field)
+
+    params = {'value': value, 'condition': condition_value}
+    with write_transaction(conn, delta):
+        ids = [row[0] for row in conn.execute(f"SELECT id FROM {table} WHERE {condition_field} = :condition",
+                                              params)]
+        count = conn.execute(f"UPDATE {table} SET {field} = :value WHERE {condition_field} = :condition",
+                             params).rowcount
+        if delta is not None and ids:
+            delta.upsert(table, ids)
+            for child, condition in DEPENDENT_ROWS[table]:
+                delta.upsert(child, (row[0] for row in select_in(
+                    conn, f"SELECT id FROM {child} WHERE {condition.format(ids='{marks}')}", ids)))
+    return count
+
+
+def get_or_insert(conn: sqlite3.Connection, table: str, values: Dict[str, object],
+                  delta: Optional[Delta] = None) -> int:
+    """``values`` ustunlari bo'yicha qator id si; bo'lmasa qo'shiladi va ``delta`` ga yoziladi"""
+    _check_identifiers(table, *values)
+    select = f"SELECT id FROM {table} WHERE " + ' AND '.join(f"{column} = :{column}" for column in values)
+    row = conn.execute(select, values).fetchone()
+    if row is not None:
+        return row[0]
+    with write_transaction(conn, delta):
+        # Boshqa sessiya shu orada qo'shgan bo'lishi mumkin
+        row = conn.execute(select, values).fetchone()
+        if row is not None:
+            return row[0]
+        row_id = conn.execute(f"INSERT INTO {table} ({', '.join(values)}) "
+                              f"VALUES ({', '.join(':' + column for column in values)})", values).lastrowid
+        if delta is not None:
+            delta.upsert(table, [row_id])
+    return row_id
+
+
+def upsert_value(conn: sqlite3.Connection, disease_id: int, symptom_id: int, value,
+                 delta: Optional[Delta] = None):
+    """Bitta (kasallik, simptom) qiymatini yozish yoki yangilash"""
+    with write_transaction(conn, delta):
+        conn.execute(UPSERT_VALUE_SQL, (disease_id, symptom_id, value))
+        if delta is not None:
+            delta.upsert('disease_symptoms', (row[0] for row in conn.execute(
+                "SELECT id FROM disease_symptoms WHERE disease_id = ? AND symptom_id = ?", (disease_id, symptom_id))))
+
+
+class SaveReport(NamedTuple):
+    diseases_added: int = 0
+    groups_added: int = 0
+    symptoms_added: int = 0
+    values_added: int = 0
+    values_changed: int = 0
+    values_unchanged: int = 0
+
+    @property
+    def changed(self) -> bool:
+        return any(self[:5])
+
+
+def save_symptom_matrix(conn: sqlite3.Connection, symptom_matrix: Sequence[Sequence],
+                        delta: Optional[Delta] = None) -> SaveReport:
+    """"Saqlash" oqimi: [kasallik, guruh, simptom, qiymat] qatorlarini bitta tranzaksiyada yozish.
+
+    Kasallik, guruh va simptom id lari xotiradagi nom -> id keshlari orqali
+    aniqlanadi, yangi yozuvlar esa ``executemany`` bilan qo'shiladi.
+    Faqat yangi yoki o'zgargan qiymatlar yoziladi, shuning uchun bir xil
+    ma'lumotni qayta saqlash bazani o'zgartirmaydi.
+    """
+    if not symptom_matrix:
+        return SaveReport()
+
+    with write_transaction(conn, delta):
+        disease_ids, diseases_added = _resolve_diseases(conn, (r[0] for r in symptom_matrix))
+        group_ids, groups_added = _resolve_groups(conn, ((disease_ids[r[0]], r[1]) for r in symptom_matrix))
+        symptom_ids, symptoms_added = _resolve_symptoms(
+            conn, ((group_ids[(disease_ids[r[0]], r[1])], r[2]) for r in symptom_matrix))
+
+        values = {}
+        for kasallik, group, symptom, value in symptom_matrix:
+            disease_id = disease_ids[kasallik]
+            symptom_id = symptom_ids[(group_ids[(disease_id, group)], symptom)]
+            values[(disease_id, symptom_id)] = value
+
+        existing = {(d, s): v for d, s, v in select_in(
+            conn, "SELECT disease_id, symptom_id, value FROM disease_symptoms WHERE disease_id IN ({marks})",
+            {k[0] for k in values})}
+        changes = [(d, s, v) for (d, s), v in values.items() if existing.get((d, s)) != v]
+        conn.executemany(UPSERT_VALUE_SQL, changes)
+
+        if delta is not None:
+            delta.upsert('diseases', diseases_added)
+            delta.upsert('symptom_groups', groups_added)
+            delta.upsert('symptoms', symptoms_added)
+            changed = {(d, s) for d, s, _ in changes}
+            delta.upsert('disease_symptoms', (row_id for row_id, d, s in select_in(
+                conn, "SELECT id, disease_id, symptom_id FROM disease_symptoms WHERE symptom_id IN ({marks})",
+                {s for _, s in changed}) if (d, s) in changed))
+
+    values_added = sum(1 for d, s, _ in changes if (d, s) not in existing)
+    return SaveReport(len(diseases_added), len(groups_added), len(symptoms_added), values_added,
+                      len(changes) - values_added, len(values) - len(changes))
@@ -0,0 +1,272 @@
+import json
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from migrations import matrix_source
+
+CATALOG_PATH = Path('symptoms.json')
+CATALOG_TABS = ('tab_0', 'tab_1', 'tab_2', 'tab_3', 'tab_4')
+
+
+class Diagnosis(NamedTuple):
+    disease: str
+    score: float
+    matched: int
+
+
+def normalize_name(name: str) -> str:
+    """Simptom nomini solishtirish uchun bir xil ko'rinishga keltirish"""
+    return ' '.join(str(name).split()).casefold()
+
+
+def catalog_key(name: str) -> str:
+    """Katalogdagi to'liq nom va illnesses dagi qisqa nomni moslashtirish (qavslar ichidagi izohlarsiz)"""
+    return normalize_name(re.sub(r'\([^)]*\)', ' ', str(name)))
+
+
+def _compile_rows(diseases: Sequence[tuple], values: Sequence[tuple]) -> Tuple[List[str], List[int], List[int]]:
+    """Qiymat qatorlaridan simptom nomlari va 1 qiymatli (kasallik, simptom) pozitsiyalari"""
+    disease_pos = {d[0]: i for i, d in enumerate(diseases)}
+    symptom_names: List[str] = []
+    symptom_pos: Dict[str, int] = {}
+    rows, cols = [], []
+    for v in values:
+        # v = (id, disease_id, symptom_id, value, disease_name, symptom_name, group_name)
+        key = normalize_name(v[5])
+        if key not in symptom_pos:
+            symptom_pos[key] = len(symptom_names)
+            symptom_names.append(v[5].strip())
+        if v[3] and v[1] in disease_pos:
+            rows.append(disease_pos[v[1]])
+            cols.append(symptom_pos[key])
+    return symptom_names, rows, cols
+
+
+class DiagnosisEngine:
+    """Kasallik x simptom matritsasi asosida differensial tashxis.
+
+    Bilimlar bazasi bir marta zich 0/1 matritsaga kompilyatsiya qilinadi,
+    bemor simptomlari esa barcha kasalliklarga bitta vektor amali bilan
+    solishtiriladi (Jaccard o'xshashligi). Matritsa simptom x kasallik
+    ko'rinishida saqlanadi, shuning uchun bitta bemor uchun faqat tanlangan
+    simptomlar qatorlari yig'iladi.
+    """
+
+    def __init__(self, disease_names: Sequence[str], symptom_names: Sequence[str], matrix: np.ndarray):
+        self.disease_names = list(disease_names)
+        self.symptom_names = list(symptom_names)
+        self.symptom_index = {normalize_name(name): i for i, name in enumerate(self.symptom_names)}
+        matrix = np.asarray(matrix, dtype=np.float32)
+        self.by_symptom = np.ascontiguousarray(matrix.T)
+        self.disease_sizes = matrix.sum(axis=1)
+
+    @property
+    def shape(self):
+        return len(self.disease_names), len(self.symptom_names)
+
+    @classmethod
+    def from_rows(cls, diseases: Sequence[tuple], values: Sequence[tuple]) -> 'DiagnosisEngine':
+        """get_all_data() natijasidan (diseases, values) dvigatel yaratish"""
+        symptom_names, rows, cols = _compile_rows(diseases, values)
+        matrix = np.zeros((len(diseases), len(symptom_names)), dtype=np.float32)
+        matrix[rows, cols] = 1.0
+        return cls([d[1] for d in diseases], symptom_names, matrix)
+
+    @classmethod
+    def from_catalog(cls, catalog: Dict) -> 'DiagnosisEngine':
+        """symptoms.json tuzilmasidan ("+"/"-" xaritasi) dvigatel yaratish"""
+        symptom_names = [entry['name'] for tab in CATALOG_TABS for entry in catalog.get(tab, [])]
+        symptom_pos = {catalog_key(name): i for i, name in enumerate(symptom_names)}
+        illnesses = catalog.get('illnesses', [])
+
+        rows, cols = [], []
+        for i, illness in enumerate(illnesses):
+            for name, sign in illness['symptoms'].items():
+                key = catalog_key(name)
+                if key not in symptom_pos:
+                    symptom_pos[key] = len(symptom_names)
+                    symptom_names.append(name)
+                if sign == '+':
+                    rows.append(i)
+                    cols.append(symptom_pos[key])
+
+        matrix = np.zeros((len(illnesses), len(symptom_names)), dtype=np.float32)
+        matrix[rows, cols] = 1.0
+        return cls([illness['name'] for illness in illnesses], symptom_names, matrix)
+
+    @classmethod
+    def from_connection(cls, conn) -> 'DiagnosisEngine':
+        """Ma'lumotlar bazasidagi kasallik va qiymatlardan dvigatel yaratish"""
+        diseases = conn.execute("SELECT id, name FROM diseases").fetchall()
+        values = conn.execute(f"""
+            SELECT id, disease_id, symptom_id, value, NULL, symptom_name, NULL FROM {matrix_source(conn)}
+        """).fetchall()
+        return cls.from_rows(diseases, values)
+
+    @classmethod
+    def from_json(cls, path: Path = CATALOG_PATH) -> 'DiagnosisEngine':
+        with open(path, encoding='utf-8') as f:
+            return cls.from_catalog(json.load(f))
+
+    def symptom_ids(self, symptoms: Iterable[str]) -> np.ndarray:
+        """Simptom nomlarini ustun indekslariga aylantirish (noma'lumlari tashlab yuboriladi)"""
+        keys = {normalize_name(name) for name in symptoms}
+        return np.array(sorted(self.symptom_index[k] for k in keys if k in self.symptom_index), dtype=np.intp)
+
+    def _jaccard(self, hits: np.ndarray, query_sizes) -> np.ndarray:
+        union = self.disease_sizes + query_sizes - hits
+        return np.divide(hits, union, out=np.zeros_like(hits), where=union > 0)
+
+    def top_k(self, scores: np.ndarray, k: int) -> np.ndarray:
+        """Bitta ballar qatori uchun eng yuqori k ta kasallik indekslari (kamayish tartibida).
+
+        ``InvertedIndex.search`` kabi faqat ijobiy ballilar qaytariladi.
+        """
+        positive = np.flatnonzero(scores > 0)
+        k = min(k, len(positive))
+        if k <= 0:
+            return np.empty(0, dtype=np.intp)
+        top = positive[np.argpartition(-scores[positive], k - 1)[:k]]
+        return top[np.argsort(-scores[top], kind='stable')]
+
+    def top_k_rows(self, scores: np.ndarray, k: int) -> List[np.ndarray]:
+        """(N, D) ballar matritsasining har bir qatori uchun top-k indekslar (faqat ijobiy ballilar)"""
+        k = min(k, scores.shape[1])
+        if k <= 0:
+            return [np.empty(0, dtype=np.intp) for _ in range(scores.shape[0])]
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind='stable')
+        top = np.take_along_axis(top, order, axis=1)
+        # Tartiblangan qatorda nol ballilar oxirida turadi
+        counts = (top_scores > 0).sum(axis=1)
+        return [row[:count] for row, count in zip(top, counts.tolist())]
+
+    def rank_matrix(self, queries: np.ndarray, k: int = 5) -> List[List[Diagnosis]]:
+        """Bir nechta bemorni bitta matritsa ko'paytmasi bilan tartiblash"""
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        hits = queries @ self.by_symptom
+        scores = self._jaccard(hits, queries.sum(axis=1, keepdims=True))
+        top = self.top_k_rows(scores, k)
+        return [[Diagnosis(self.disease_names[i], float(scores[n, i]), int(hits[n, i])) for i in row]
+                for n, row in enumerate(top)]
+
+    def rank_ids(self, symptom_ids: np.ndarray, k: int = 5) -> List[Diagnosis]:
+        """Ustun indekslari bo'yicha tartiblash: faqat tanlangan qatorlar yig'iladi"""
+        hits = self.by_symptom[symptom_ids].sum(axis=0)
+        scores = self._jaccard(hits, np.float32(len(symptom_ids)))
+        return [Diagnosis(self.disease_names[i], float(scores[i]), int(hits[i]))
+                for i in self.top_k(scores, k)]
+
+    def rank(self, symptoms: Iterable[str], k: int = 5) -> List[Diagnosis]:
+        """Bemor simptomlari bo'yicha eng ehtimoliy k ta tashxis"""
+        return self.rank_ids(self.symptom_ids(symptoms), k)
+
+
+class InvertedIndex:
+    """Simptom -> kasalliklar ro'yxati (posting) indeksi va erta to'xtaydigan top-k qidiruv.
+
+    Bemorda odatda bir necha simptom bo'ladi, shuning uchun barcha kasalliklarni
+    baholash o'rniga faqat tanlangan simptomlarning postinglari ko'rib chiqiladi.
+    Postinglar qisqasidan boshlab qayta ishlanadi (MaxScore): qolgan ro'yxatlar
+    hali ko'rilmagan kasallikni top-k ga olib kira olmasa, ular faqat mavjud
+    nomzodlarning ballarini aniqlashtirish uchun ishlatiladi.
+    """
+
+    def __init__(self, disease_names: Sequence[str], symptom_names: Sequence[str],
+                 rows: Sequence[int], cols: Sequence[int]):
+        self.disease_names = list(disease_names)
+        self.symptom_names = list(symptom_names)
+        self.symptom_index = {normalize_name(name): i for i, name in enumerate(self.symptom_names)}
+        rows = np.asarray(rows, dtype=np.int32)
+        cols = np.asarray(cols, dtype=np.int32)
+
+        # Postinglar kasallik pozitsiyasi bo'yicha tartiblangan va takrorlanmaydi
+        order = np.lexsort((rows, cols))
+        rows, cols = rows[order], cols[order]
+        keep = np.ones(len(rows), dtype=bool)
+        keep[1:] = (rows[1:] != rows[:-1]) | (cols[1:] != cols[:-1])
+        rows, cols = rows[keep], cols[keep]
+        bounds = np.searchsorted(cols, np.arange(len(self.symptom_names) + 1))
+        self.postings = [rows[bounds[i]:bounds[i + 1]] for i in range(len(self.symptom_names))]
+        self.disease_sizes = np.bincount(rows, minlength=len(self.disease_names)).astype(np.float32)
+
+    @classmethod
+    def from_rows(cls, diseases: Sequence[tuple], values: Sequence[tuple]) -> 'InvertedIndex':
+        symptom_names, rows, cols = _compile_rows(diseases, values)
+        return cls([d[1] for d in diseases], symptom_names, rows, cols)
+
+    @classmethod
+    def from_engine(cls, engine: DiagnosisEngine) -> 'InvertedIndex':
+        cols, rows = np.nonzero(engine.by_symptom)
+        return cls(engine.disease_names, engine.symptom_names, rows, cols)
+
+    def symptom_ids(self, symptoms: Iterable[str]) -> List[int]:
+        keys = {normalize_name(name) for name in symptoms}
+        return sorted(self.symptom_index[k] for k in keys if k in self.symptom_index)
+
+    def search(self, symptom_ids: Sequence[int], k: int = 5) -> List[Diagnosis]:
+        """Eng yuqori Jaccard balli k ta kasallik (faqat kamida bitta mos simptomi borlari)"""
+        n_query = len(symptom_ids)
+        lists = sorted((self.postings[s] for s in symptom_ids), key=len)
+        if n_query == 0 or k <= 0:
+            return []
+
+        candidates = np.empty(0, dtype=np.int32)
+        hits = np.empty(0, dtype=np.int32)
+        threshold = -1.0
+        for i, plist in enumerate(lists):
+            remaining = n_query - i
+            if len(candidates) >= k:
+                threshold = self._kth_score(candidates, hits, n_query, k)
+                # Ko'rilmagan kasallik eng ko'pi bilan remaining / n_query ball olishi mumkin
+                if remaining / n_query <= threshold:
+                    break
+            merged = np.union1d(candidates, plist)
+            merged_hits = np.zeros(len(merged), dtype=np.int32)
+            merged_hits[np.searchsorted(merged, candidates)] = hits
+            merged_hits[np.searchsorted(merged, plist)] += 1
+            candidates, hits = merged, merged_hits
+        else:
+            i = len(lists)
+
+        # Qolgan (uzun) ro'yxatlar faqat mavjud nomzodlar uchun tekshiriladi
+        for j, plist in enumerate(lists[i:], i):
+            if len(plist):
+                pos = np.minimum(np.searchsorted(plist, candidates), len(plist) - 1)
+                hits += plist[pos] == candidates
+            remaining = n_query - j - 1
+            upper = self._jaccard(candidates, hits + remaining, n_query)
+            keep = upper >= threshold
+            candidates, hits = candidates[keep], hits[keep]
+
+        scores = self._jaccard(candidates, hits, n_query)
+        k = min(k, len(candidates))
+        if k == 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return [Diagnosis(self.disease_names[candidates[i]], float(scores[i]), int(hits[i])) for i in top]
+
+    def rank(self, symptoms: Iterable[str], k: int = 5) -> List[Diagnosis]:
+        return self.search(self.symptom_ids(symptoms), k)
+
+    def _jaccard(self, candidates: np.ndarray, hits: np.ndarray, n_query: int) -> np.ndarray:
+        hits = hits.astype(np.float32)
+        union = self.disease_sizes[candidates] + n_query - hits
+        return np.divide(hits, union, out=np.zeros_like(hits), where=union > 0)
+
+    def _kth_score(self, candidates: np.ndarray, hits: np.ndarray, n_query: int, k: int) -> float:
+        scores = self._jaccard(candidates, hits, n_query)
+        return float(np.partition(scores, len(scores) - k)[len(scores) - k])
+
+
+def load_index(diseases: Sequence[tuple], values: Sequence[tuple],
+               catalog_path: Optional[Path] = None) -> InvertedIndex:
+    """Bazada qiymatlar bo'lmasa, symptoms.json katalogidan foydalanish (zich matritsa saqlanmaydi)"""
+    if values or catalog_path is None:
+        return InvertedIndex.from_rows(diseases, values)
+    return InvertedIndex.from_engine(DiagnosisEngine.from_json(catalog_path))
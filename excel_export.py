@@ -0,0 +1,88 @@
+from io import BytesIO
+from typing import Dict, Sequence, Tuple
+
+import openpyxl
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Font, NamedStyle, Side
+from openpyxl.utils import get_column_letter
+
+SHEET_TITLE = "Kasalliklar va Simptomlar"
+FIXED_HEADERS = ['Simptomlar Guruhi', 'Simptom']
+
+
+def _cell_style(name: str, bold: bool) -> NamedStyle:
+    style = NamedStyle(name=name)
+    style.font = Font(name='Times New Roman', size=14, bold=bold)
+    style.alignment = Alignment(horizontal='center', vertical='center')
+    side = Side(style='thin')
+    style.border = Border(left=side, right=side, top=side, bottom=side)
+    return style
+
+
+def build_pivot(values: Sequence[tuple]) -> Dict[Tuple[int, int], int]:
+    """(disease_id, symptom_id) -> qiymat; takroriy qatorlarda eng oxirgisi olinadi"""
+    return {(v[1], v[2]): v[3] for v in values}
+
+
+def build_workbook(diseases: Sequence[tuple], symptoms: Sequence[tuple],
+                   values: Sequence[tuple], write_only: bool = True) -> openpyxl.Workbook:
+    """Simptom x kasallik jadvalini Excel kitobiga yozish.
+
+    Har bir katak bitta lug'at so'rovi bilan topiladi. ``write_only`` rejimida
+    qatorlar to'g'ridan-to'g'ri oqimga yoziladi va xotira sarfi o'zgarmaydi.
+    """
+    pivot = build_pivot(values)
+    disease_ids = [d[0] for d in diseases]
+    headers = FIXED_HEADERS + [d[1] for d in diseases]
+
+    # Ustun kengliklari ma'lumotlardan oldindan hisoblanadi (qiymatlar 0/1)
+    widths = [len(h) for h in headers]
+    for symptom in symptoms:
+        widths[0] = max(widths[0], len(str(symptom[3])))
+        widths[1] = max(widths[1], len(str(symptom[2])))
+
+    workbook = openpyxl.Workbook(write_only=write_only)
+    worksheet = workbook.create_sheet(SHEET_TITLE) if write_only else workbook.active
+    worksheet.title = SHEET_TITLE
+    header_style = _cell_style('kasallik_header', bold=True)
+    body_style = _cell_style('kasallik_cell', bold=False)
+    workbook.add_named_style(header_style)
+    workbook.add_named_style(body_style)
+
+    for col, width in enumerate(widths, 1):
+        worksheet.column_dimensions[get_column_letter(col)].width = width + 4
+
+    if write_only:
+        # Kitobda ro'yxatdan o'tgan NamedStyle har bir katakka nomi bilan beriladi
+        def styled_row(row, style):
+            cells = []
+            for value in row:
+                cell = WriteOnlyCell(worksheet, value=value)
+                cell.style = style
+                cells.append(cell)
+            return cells
+    else:
+        def styled_row(row, style):
+            return row
+
+    worksheet.append(styled_row(headers, header_style.name))
+    for symptom in symptoms:
+        row = [symptom[3], symptom[2]] + [pivot.get((disease_id, symptom[0]), 0) for disease_id in disease_ids]
+        worksheet.append(styled_row(row, body_style.name))
+
+    if not write_only:
+        for row in worksheet.iter_rows(min_row=1, max_row=1):
+            for cell in row:
+                cell.style = header_style.name
+        for row in worksheet.iter_rows(min_row=2):
+            for cell in row:
+                cell.style = body_style.name
+
+    return workbook
+
+
+def workbook_bytes(workbook: openpyxl.Workbook) -> BytesIO:
+    excel_file = BytesIO()
+    workbook.save(excel_file)
+    excel_file.seek(0)
+    return excel_file
@@ -0,0 +1,137 @@
+"""export_to_excel() formatidagi faylni qayta import qilish.
+
+Fayl openpyxl read-only rejimida qatorma-qator o'qiladi. Har bir qator
+(guruh, simptom) bo'yicha mavjud simptomga, har bir ustun esa kasallik
+nomiga moslanadi; bazadagi qiymatlar bilan solishtirilib faqat o'zgargan
+kataklar bitta tranzaksiyada yoziladi.
+"""
+from collections import defaultdict, deque
+from itertools import islice
+from typing import BinaryIO, Deque, Dict, Iterator, List, NamedTuple, Tuple, Union
+from zipfile import BadZipFile
+
+import openpyxl
+from openpyxl.utils.exceptions import InvalidFileException
+
+from database import UPSERT_VALUE_SQL, select_in
+from excel_export import FIXED_HEADERS, SHEET_TITLE
+
+CHUNK_SIZE = 500
+
+# Fayl xlsx bo'lmasa, buzilgan yoki kesilgan bo'lsa ko'tariladigan xatolar
+INVALID_WORKBOOK_ERRORS = (BadZipFile, InvalidFileException)
+
+
+class ImportReport(NamedTuple):
+    rows: int = 0
+    values_added: int = 0
+    values_changed: int = 0
+    values_unchanged: int = 0
+    invalid_cells: int = 0
+    unmatched_rows: Tuple[str, ...] = ()
+    unmatched_columns: Tuple[str, ...] = ()
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.values_added or self.values_changed)
+
+
+def _cell_value(value) -> Union[int, None]:
+    """Katakni 0/1 ga aylantirish; bo'sh katak 0, boshqa qiymatlar None (noto'g'ri)"""
+    if value is None or value == '':
+        return 0
+    try:
+        number = int(float(value))
+    except (TypeError, ValueError):
+        return None
+    return number if number in (0, 1) and number == float(value) else None
+
+
+def _occurrence_map(rows) -> Dict[tuple, Deque[int]]:
+    """Nom -> id lar navbati; bir xil nomlar eksportdagi (id) tartibida moslanadi"""
+    mapping = defaultdict(deque)
+    for key, row_id in rows:
+        mapping[key].append(row_id)
+    return mapping
+
+
+def iter_sheet(source: Union[str, BinaryIO]) -> Tuple[List[str], Iterator[tuple]]:
+    try:
+        workbook = openpyxl.load_workbook(source, read_only=True, data_only=True)
+    except KeyError as e:
+        # Zip arxiv, lekin xlsx emas (masalan, [Content_Types].xml yo'q)
+        raise InvalidFileException(f"Fayl xlsx formatida emas: {e}") from e
+    worksheet = workbook[SHEET_TITLE] if SHEET_TITLE in workbook.sheetnames else workbook.active
+    rows = worksheet.iter_rows(values_only=True)
+    header = next(rows, ())
+    if list(header[:2]) != FIXED_HEADERS:
+        workbook.close()
+        raise ValueError("Fayl eksport formatiga mos emas: birinchi ustunlar "
+                         f"{FIXED_HEADERS} bo'lishi kerak")
+
+    def body():
+        try:
+            yield from rows
+        finally:
+            workbook.close()
+
+    return [str(h) for h in header[2:]], body()
+
+
+def import_workbook(conn, source: Union[str, BinaryIO]) -> ImportReport:
+    """Excel faylidagi o'zgarishlarni bazaga qo'llash"""
+    disease_names, rows = iter_sheet(source)
+
+    diseases = _occurrence_map(((name,), disease_id) for disease_id, name in
+                               conn.execute("SELECT id, name FROM diseases ORDER BY id"))
+    column_ids, unmatched_columns = [], []
+    for name in disease_names:
+        ids = diseases.get((name,))
+        column_ids.append(ids.popleft() if ids else None)
+        if column_ids[-1] is None:
+            unmatched_columns.append(name)
+
+    symptoms = _occurrence_map(((group_name, symptom_name), symptom_id) for symptom_id, symptom_name, group_name in
+                               conn.execute("""SELECT s.id, s.symptom_name, sg.group_name
+                                               FROM symptoms s JOIN symptom_groups sg ON s.group_id = sg.id
+                                               ORDER BY s.id"""))
+
+    counts = defaultdict(int)
+    unmatched_rows = []
+    with conn:
+        while chunk := list(islice(rows, CHUNK_SIZE)):
+            matched = []
+            for row in chunk:
+                if not any(v is not None for v in row[:2]):
+                    continue
+                counts['rows'] += 1
+                key = (str(row[0]), str(row[1]))
+                ids = symptoms.get(key)
+                if not ids:
+                    unmatched_rows.append(f"{key[0]} / {key[1]}")
+                    continue
+                matched.append((ids.popleft(), row[2:]))
+
+            existing = {(d, s): v for d, s, v in select_in(
+                conn, "SELECT disease_id, symptom_id, value FROM disease_symptoms WHERE symptom_id IN ({marks})",
+                [symptom_id for symptom_id, _ in matched])}
+
+            changes = []
+            for symptom_id, cells in matched:
+                for disease_id, cell in zip(column_ids, cells):
+                    if disease_id is None:
+                        continue
+                    value = _cell_value(cell)
+                    if value is None:
+                        counts['invalid_cells'] += 1
+                        continue
+                    # Eksportda yo'q qiymat 0 ko'rinishida yoziladi, shuning uchun 0 yangi qator yaratmaydi
+                    current = existing.get((disease_id, symptom_id), 0)
+                    if current == value:
+                        counts['values_unchanged'] += 1
+                        continue
+                    changes.append((disease_id, symptom_id, value))
+                    counts['values_changed' if (disease_id, symptom_id) in existing else 'values_added'] += 1
+            conn.executemany(UPSERT_VALUE_SQL, changes)
+
+    return ImportReport(unmatched_rows=tuple(unmatched_rows), unmatched_columns=tuple(unmatched_columns), **counts)
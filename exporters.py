@@ -0,0 +1,174 @@
+"""Bilimlar bazasini CSV / JSON Lines / Parquet ko'rinishida oqimli eksport qilish.
+
+Qatorlar SQLite kursoridan bo'laklab o'qiladi va darhol yoziladi, shuning
+uchun to'liq ro'yxatlar xotirada qurilmaydi.
+
+    python exporters.py pivot --format csv -o pivot.csv
+    python exporters.py disease_symptoms --format parquet -o values.parquet
+"""
+import argparse
+import csv
+import json
+import sqlite3
+import sys
+from itertools import groupby
+from pathlib import Path
+from typing import Iterator, List, Optional, Sequence, TextIO, Tuple
+
+from database import DATABASE_PATH
+from migrations import matrix_source
+
+FETCH_SIZE = 1000
+PARQUET_BATCH_SIZE = 10000
+FORMATS = ('csv', 'jsonl', 'parquet')
+
+TABLE_QUERIES = {
+    'diseases': (
+        ['id', 'name'],
+        "SELECT id, name FROM diseases ORDER BY id",
+    ),
+    'symptom_groups': (
+        ['id', 'disease_id', 'group_name', 'disease_name'],
+        """SELECT sg.id, sg.disease_id, sg.group_name, d.name
+           FROM symptom_groups sg JOIN diseases d ON sg.disease_id = d.id ORDER BY sg.id""",
+    ),
+    'symptoms': (
+        ['id', 'group_id', 'symptom_name', 'group_name'],
+        """SELECT s.id, s.group_id, s.symptom_name, sg.group_name
+           FROM symptoms s JOIN symptom_groups sg ON s.group_id = sg.id ORDER BY s.id""",
+    ),
+    'disease_symptoms': (
+        ['id', 'disease_id', 'symptom_id', 'value', 'disease_name', 'symptom_name', 'group_name'],
+        """SELECT id, disease_id, symptom_id, value, disease_name, symptom_name, group_name
+           FROM {matrix} ORDER BY id""",
+    ),
+}
+DATASETS = ('pivot',) + tuple(TABLE_QUERIES)
+
+Rows = Tuple[List[str], Iterator[tuple]]
+
+
+def iter_cursor(conn: sqlite3.Connection, sql: str) -> Iterator[tuple]:
+    cursor = conn.execute(sql)
+    while rows := cursor.fetchmany(FETCH_SIZE):
+        yield from rows
+
+
+def iter_table(conn: sqlite3.Connection, table: str) -> Rows:
+    header, sql = TABLE_QUERIES[table]
+    return list(header), iter_cursor(conn, sql.format(matrix=matrix_source(conn)))
+
+
+def iter_pivot(conn: sqlite3.Connection) -> Rows:
+    """Simptom x kasallik jadvali: har bir simptom uchun bitta qator, kasallik ustunlari 0/1"""
+    diseases = conn.execute("SELECT id, name FROM diseases ORDER BY id").fetchall()
+    position = {disease_id: i for i, (disease_id, _) in enumerate(diseases)}
+    header = ['Simptomlar Guruhi', 'Simptom'] + [name for _, name in diseases]
+
+    # Qiymatlar simptom bo'yicha tartiblangan, shuning uchun bir vaqtda faqat bitta qator yig'iladi
+    cells = iter_cursor(conn, """
+        SELECT s.id, sg.group_name, s.symptom_name, ds.disease_id, ds.value
+        FROM symptoms s
+        JOIN symptom_groups sg ON s.group_id = sg.id
+        LEFT JOIN disease_symptoms ds ON ds.symptom_id = s.id
+        ORDER BY s.id
+    """)
+
+    def rows():
+        for _, group in groupby(cells, key=lambda c: c[0]):
+            group = list(group)
+            row = [0] * len(diseases)
+            for _, _, _, disease_id, value in group:
+                if disease_id in position:
+                    row[position[disease_id]] = value
+            yield (group[0][1], group[0][2], *row)
+
+    return header, rows()
+
+
+def write_csv(header: Sequence[str], rows: Iterator[tuple], out: TextIO) -> int:
+    writer = csv.writer(out)
+    writer.writerow(header)
+    count = 0
+    for row in rows:
+        writer.writerow(row)
+        count += 1
+    return count
+
+
+def write_jsonl(header: Sequence[str], rows: Iterator[tuple], out: TextIO) -> int:
+    count = 0
+    for row in rows:
+        out.write(json.dumps(dict(zip(header, row)), ensure_ascii=False) + '\n')
+        count += 1
+    return count
+
+
+def write_parquet(header: Sequence[str], rows: Iterator[tuple], path: Path) -> int:
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise RuntimeError("Parquet eksporti uchun pyarrow o'rnatilishi kerak (pip install pyarrow)") from e
+
+    count = 0
+    writer = None
+    try:
+        while batch := [row for _, row in zip(range(PARQUET_BATCH_SIZE), rows)]:
+            columns = list(zip(*batch))
+            table = pa.table({name: list(column) for name, column in zip(header, columns)})
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema)
+            writer.write_table(table)
+            count += len(batch)
+    finally:
+        if writer is not None:
+            writer.close()
+    return count
+
+
+def export_dataset(conn: sqlite3.Connection, dataset: str, fmt: str,
+                   output: Optional[Path] = None) -> int:
+    """Jadval yoki pivotni berilgan formatda faylga (yoki stdout ga) yozish"""
+    if dataset not in DATASETS or fmt not in FORMATS:
+        raise ValueError(f"Noma'lum eksport: {dataset} / {fmt}")
+
+    header, rows = iter_pivot(conn) if dataset == 'pivot' else iter_table(conn, dataset)
+    if fmt == 'parquet':
+        if output is None:
+            raise ValueError("Parquet eksporti uchun chiqish fayli ko'rsatilishi kerak")
+        return write_parquet(header, rows, output)
+
+    write = write_csv if fmt == 'csv' else write_jsonl
+    if output is None:
+        return write(header, rows, sys.stdout)
+    with open(output, 'w', encoding='utf-8', newline='') as out:
+        return write(header, rows, out)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Bilimlar bazasini oqimli eksport qilish")
+    parser.add_argument('dataset', choices=DATASETS)
+    parser.add_argument('--format', choices=FORMATS, default='csv')
+    parser.add_argument('-o', '--output', type=Path)
+    parser.add_argument('--db', type=Path, default=DATABASE_PATH)
+    args = parser.parse_args(argv)
+
+    # Baza faqat o'qish uchun ochiladi: yo'q fayl yaratilmaydi va migratsiya qilinmaydi
+    if not args.db.is_file():
+        print(f"Baza topilmadi: {args.db}", file=sys.stderr)
+        return 1
+    conn = sqlite3.connect(f"file:{args.db}?mode=ro", uri=True)
+    try:
+        count = export_dataset(conn, args.dataset, args.format, args.output)
+    except (RuntimeError, ValueError) as e:
+        print(e, file=sys.stderr)
+        return 1
+    finally:
+        conn.close()
+    print(f"{count} ta qator eksport qilindi", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,171 @@
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Optional, Sequence, Tuple
+
+from catalog import TABLES, Catalog
+from database import DATABASE_PATH, Delta, get_connection, get_or_insert, load_rows
+from typeahead import TypeaheadIndex
+
+logger = logging.getLogger(__name__)
+
+
+class KnowledgeBaseCache:
+    """Jarayon bo'yicha yagona, faqat o'qish uchun bilimlar bazasi nusxasi (``catalog.Catalog``).
+
+    Har bir nusxa versiya raqami bilan belgilanadi. Yozuvchi funksiyalar
+    o'zgargan qatorlarni ``apply()`` bilan nusxaga qo'llaydi yoki
+    ``invalidate()`` orqali to'liq qayta yuklashni so'raydi; sessiyalar
+    ma'lumotni faqat versiya o'zgarganda qayta oladi va hammasi bitta nusxadan foydalanadi.
+
+    Nusxa bazadagi ``kb_version`` hisoblagichining qaysi qiymatiga mosligi ham
+    saqlanadi: ``sync()`` boshqa jarayon yozganini shu orqali aniqlaydi.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = 0
+        self._snapshot: Tuple[int, Any] = (-1, None)
+        # Joriy nusxa mos keladigan kb_version (nusxa yo'q yoki eskirgan bo'lsa None)
+        self._db_version: Optional[int] = None
+        self._derived: Dict[str, Tuple[int, Any]] = {}
+        self._build_locks: Dict[str, threading.Lock] = {}
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def invalidate(self) -> int:
+        with self._lock:
+            self._version += 1
+            self._db_version = None
+            return self._version
+
+    def sync(self, db_version: int) -> bool:
+        """Bazadagi kb_version nusxanikidan farq qilsa (boshqa yozuvchi), nusxani eskirgan deb belgilash"""
+        with self._lock:
+            if self._db_version is None or self._db_version == db_version:
+                return False
+            self._version += 1
+            self._db_version = None
+        logger.info("Bilimlar bazasi boshqa jarayonda o'zgardi (kb_version=%d), kesh yangilanadi", db_version)
+        return True
+
+    def get(self, loader: Callable[[], Tuple[int, Any]]) -> Tuple[int, Any]:
+        """(versiya, ma'lumot) qaytarish; eskirgan bo'lsa bir marta qayta yuklash.
+
+        ``loader`` (kb_version, jadvallar) qaytaradi (``database.load_snapshot``).
+        """
+        snapshot = self._snapshot
+        if snapshot[0] == self._version:
+            return snapshot
+        with self._lock:
+            # Bir vaqtda kelgan sessiyalardan faqat bittasi bazaga murojaat qiladi
+            if self._snapshot[0] != self._version:
+                version = self._version
+                db_version, tables = loader()
+                self._snapshot = (version, Catalog.from_rows(*tables))
+                self._db_version = db_version
+            return self._snapshot
+
+    def apply(self, delta, load_rows: Callable[[str, Sequence[int]], Iterable[tuple]]) -> int:
+        """Yozuv natijasini (``database.Delta``) nusxaga qo'llash va yangi versiyani qaytarish.
+
+        Faqat o'zgargan qatorlar ``load_rows`` orqali qayta o'qiladi. Nusxa
+        allaqachon eskirgan bo'lsa, nusxadan keyin boshqa yozuvchi ham
+        o'zgartirgan bo'lsa (``delta.since`` mos kelmasa) yoki qo'llashda xato
+        bo'lsa, versiya shunchaki oshiriladi va keyingi ``get()`` hammasini qayta yuklaydi.
+        """
+        if not delta:
+            return self._version
+        with self._lock:
+            version, data = self._snapshot
+            fresh = (version == self._version and data is not None
+                     and self._db_version is not None and delta.since == self._db_version)
+            self._version += 1
+            self._db_version = None
+            if not fresh:
+                return self._version
+            try:
+                changes = {}
+                for table in TABLES:
+                    upserted = sorted(delta.upserted.get(table, ()))
+                    deleted = delta.deleted.get(table, ())
+                    if not upserted and not deleted:
+                        continue
+                    rows = list(load_rows(table, upserted))
+                    # Shu orada o'chirilgan qatorlar ham nusxadan olib tashlanadi
+                    missing = set(upserted).difference(row[0] for row in rows)
+                    changes[table] = (rows, missing.union(deleted))
+                patched = data.patch(changes)
+            except Exception:
+                logger.exception("O'zgarishni keshga qo'llab bo'lmadi, to'liq qayta yuklanadi")
+                return self._version
+            self._snapshot = (self._version, patched)
+            self._db_version = delta.until
+            return self._version
+
+    def peek(self, name: str) -> Any:
+        """Joriy versiya uchun allaqachon hosil qilingan obyekt yoki None (hech narsa qurmaydi)"""
+        cached = self._derived.get(name)
+        if cached and cached[0] == self._version and self._snapshot[0] == self._version:
+            return cached[1]
+        return None
+
+    def derive(self, name: str, loader: Callable[[], Any], builder: Callable[[Any], Any]) -> Any:
+        """Nusxadan hosil qilingan obyektni (masalan, tashxis dvigateli) versiya bo'yicha keshlash.
+
+        Qurish umumiy qulfdan tashqarida, faqat shu nom uchun qulf ostida
+        bajariladi: uzoq qurilish (Excel kitobi) yozuvlar va boshqa obyektlarni to'xtatmaydi.
+        """
+        version, data = self.get(loader)
+        cached = self._derived.get(name)
+        if cached and cached[0] == version:
+            return cached[1]
+        with self._lock:
+            build_lock = self._build_locks.setdefault(name, threading.Lock())
+        with build_lock:
+            # Bir vaqtda kelgan sessiyalardan faqat bittasi quradi
+            cached = self._derived.get(name)
+            if cached and cached[0] == version:
+                return cached[1]
+            built = builder(data)
+            with self._lock:
+                # Qurilish davomida yangiroq versiya uchun qurilgan obyekt ustidan yozilmaydi
+                current = self._derived.get(name)
+                if not current or current[0] < version:
+                    self._derived[name] = (version, built)
+            return built
+
+# Streamlit sahifalari qayta ishga tushganda ham modul bir marta yuklanadi
+kb_cache = KnowledgeBaseCache()
+
+
+def apply_delta(delta: Delta, conn=None, db_path: Path = DATABASE_PATH) -> int:
+    """Yozuv natijasini umumiy keshga qo'llash: faqat o'zgargan qatorlar qayta o'qiladi"""
+    if conn is None:
+        with get_connection(db_path) as conn:
+            return apply_delta(delta, conn)
+    return kb_cache.apply(delta, lambda table, ids: load_rows(conn, table, ids))
+
+
+def insert_missing(conn, table: str, values: Dict[str, object]) -> int:
+    """Qatorni topish yoki qo'shish; yangi qator keshga ham qo'llanadi.
+
+    Yozuv xatolari (foreign key, SQLITE_BUSY va h.k.) ``sqlite3.Error`` sifatida
+    chaqiruvchiga qaytadi; bu holda kesh o'zgarmaydi.
+    """
+    delta = Delta()
+    row_id = get_or_insert(conn, table, values, delta)
+    apply_delta(delta, conn)
+    return row_id
+
+
+def typeahead_options(name: str, loader: Callable[[], Any],
+                      build_options: Callable[[Any], Dict[str, int]]) -> Tuple[Dict[str, int], TypeaheadIndex]:
+    """Nom -> id lug'ati va uning qidiruv indeksi, har bir versiya uchun bir marta quriladi"""
+    def build(data):
+        options = build_options(data)
+        return options, TypeaheadIndex(options)
+
+    return kb_cache.derive(f"typeahead_{name}", loader, build)
@@ -0,0 +1,243 @@
+"""diagnosis_data.db sxemasi migratsiyalari.
+
+Joriy sxema versiyasi ``PRAGMA user_version`` da saqlanadi. Har bir
+migratsiya o'z tranzaksiyasida bajariladi va muvaffaqiyatli bo'lsa
+versiya oshiriladi; yangi migratsiya qo'shish uchun ``MIGRATIONS``
+oxiriga (versiya, tavsif, so'rovlar) yozuvini qo'shing.
+"""
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+from typing import List, Sequence, Set, Tuple
+
+from database import DATABASE_PATH, get_connection
+
+logger = logging.getLogger(__name__)
+
+BASE_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS diseases (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS symptom_groups (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        disease_id INTEGER NOT NULL,
+        group_name TEXT NOT NULL,
+        FOREIGN KEY(disease_id) REFERENCES diseases(id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS symptoms (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        group_id INTEGER NOT NULL,
+        symptom_name TEXT NOT NULL,
+        FOREIGN KEY(group_id) REFERENCES symptom_groups(id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS disease_symptoms (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        disease_id INTEGER NOT NULL,
+        symptom_id INTEGER NOT NULL,
+        value INTEGER NOT NULL,
+        FOREIGN KEY(disease_id) REFERENCES diseases(id),
+        FOREIGN KEY(symptom_id) REFERENCES symptoms(id)
+    )
+    """,
+)
+
+INDEXES_AND_UNIQUE_KEYS = (
+    # Takroriy guruhlarni birinchisiga birlashtirish
+    """
+    UPDATE symptoms SET group_id = (
+        SELECT MIN(g2.id) FROM symptom_groups g1
+        JOIN symptom_groups g2 ON g2.disease_id = g1.disease_id AND g2.group_name = g1.group_name
+        WHERE g1.id = symptoms.group_id
+    )
+    WHERE group_id IN (SELECT id FROM symptom_groups)
+    """,
+    """
+    DELETE FROM symptom_groups WHERE id NOT IN (
+        SELECT MIN(id) FROM symptom_groups GROUP BY disease_id, group_name
+    )
+    """,
+    # Takroriy simptomlarni birinchisiga birlashtirish
+    """
+    UPDATE disease_symptoms SET symptom_id = (
+        SELECT MIN(s2.id) FROM symptoms s1
+        JOIN symptoms s2 ON s2.group_id = s1.group_id AND s2.symptom_name = s1.symptom_name
+        WHERE s1.id = disease_symptoms.symptom_id
+    )
+    WHERE symptom_id IN (SELECT id FROM symptoms)
+    """,
+    """
+    DELETE FROM symptoms WHERE id NOT IN (
+        SELECT MIN(id) FROM symptoms GROUP BY group_id, symptom_name
+    )
+    """,
+    # Har bir (kasallik, simptom) juftligi uchun eng oxirgi yozilgan qiymat qoladi
+    """
+    DELETE FROM disease_symptoms WHERE id NOT IN (
+        SELECT MAX(id) FROM disease_symptoms GROUP BY disease_id, symptom_id
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_diseases_name ON diseases(name)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS ux_symptom_groups_disease_name ON symptom_groups(disease_id, group_name)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS ux_symptoms_group_name ON symptoms(group_id, symptom_name)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS ux_disease_symptoms_pair ON disease_symptoms(disease_id, symptom_id)",
+    "CREATE INDEX IF NOT EXISTS ix_disease_symptoms_symptom ON disease_symptoms(symptom_id, disease_id, value)",
+)
+
+KB_TABLES = ('diseases', 'symptom_groups', 'symptoms', 'disease_symptoms')
+
+# Boshqa jarayonlar (yoki tashqi vositalar) yozuvini aniqlash uchun umumiy hisoblagich:
+# bilimlar bazasi jadvallaridagi har bir qator o'zgarishi uni oshiradi
+KB_VERSION = (
+    """
+    CREATE TABLE IF NOT EXISTS kb_version (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        version INTEGER NOT NULL
+    )
+    """,
+    "INSERT OR IGNORE INTO kb_version (id, version) VALUES (1, 0)",
+    *(f"""
+    CREATE TRIGGER IF NOT EXISTS trg_{table}_{event.lower()}_kb_version AFTER {event} ON {table}
+    BEGIN
+        UPDATE kb_version SET version = version + 1 WHERE id = 1;
+    END
+    """ for table in KB_TABLES for event in ('INSERT', 'UPDATE', 'DELETE')),
+)
+
+# disease_symptoms qatorlari nomlari bilan (4 jadval JOIN) — kb_matrix shu so'rovning nusxasi
+MATRIX_SELECT = """
+    SELECT ds.id, ds.disease_id, ds.symptom_id, ds.value,
+        d.name AS disease_name, s.symptom_name, sg.group_name
+    FROM disease_symptoms ds
+    JOIN diseases d ON ds.disease_id = d.id
+    JOIN symptoms s ON ds.symptom_id = s.id
+    JOIN symptom_groups sg ON s.group_id = sg.id
+"""
+
+# Har bir jadval o'zgarishida kb_matrix ning qaysi qatorlari qayta hisoblanadi:
+# hodisa -> (OLD bo'yicha o'chiriladigan kb_matrix qatorlari, NEW bo'yicha qayta qo'shiladigan JOIN qatorlari)
+MATRIX_REFRESH = {
+    'disease_symptoms': ("id = OLD.id", "ds.id = NEW.id"),
+    'diseases': ("disease_id = OLD.id", "ds.disease_id = NEW.id"),
+    'symptom_groups': ("symptom_id IN (SELECT id FROM symptoms WHERE group_id = OLD.id)", "s.group_id = NEW.id"),
+    'symptoms': ("symptom_id = OLD.id", "ds.symptom_id = NEW.id"),
+}
+
+
+def _matrix_triggers(table: str) -> Tuple[str, ...]:
+    stale, fresh = MATRIX_REFRESH[table]
+    delete = f"DELETE FROM kb_matrix WHERE {stale};"
+    insert = f"INSERT OR REPLACE INTO kb_matrix {MATRIX_SELECT} WHERE {fresh};"
+    bodies = {'INSERT': insert, 'UPDATE': f"{delete}\n{insert}", 'DELETE': delete}
+    return tuple(f"""
+    CREATE TRIGGER IF NOT EXISTS trg_{table}_{event.lower()}_kb_matrix AFTER {event} ON {table}
+    BEGIN
+        {body}
+    END
+    """ for event, body in bodies.items())
+
+
+# Kasallik x simptom qiymatlari nomlari bilan bitta jadvalda: o'quvchilar JOIN siz, bitta skan bilan oladi
+KB_MATRIX = (
+    """
+    CREATE TABLE IF NOT EXISTS kb_matrix (
+        id INTEGER PRIMARY KEY,
+        disease_id INTEGER NOT NULL,
+        symptom_id INTEGER NOT NULL,
+        value INTEGER NOT NULL,
+        disease_name TEXT NOT NULL,
+        symptom_name TEXT NOT NULL,
+        group_name TEXT NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_kb_matrix_disease ON kb_matrix(disease_id)",
+    "CREATE INDEX IF NOT EXISTS ix_kb_matrix_symptom ON kb_matrix(symptom_id)",
+    "DELETE FROM kb_matrix",
+    f"INSERT INTO kb_matrix {MATRIX_SELECT}",
+    *(trigger for table in KB_TABLES for trigger in _matrix_triggers(table)),
+)
+
+MIGRATIONS: List[Tuple[int, str, Sequence[str]]] = [
+    (1, "asosiy jadvallar", BASE_SCHEMA),
+    (2, "indekslar va unikal kalitlar", INDEXES_AND_UNIQUE_KEYS),
+    (3, "kb_version hisoblagichi va triggerlar", KB_VERSION),
+    (4, "kb_matrix: triggerlar yuritadigan kasallik x simptom jadvali", KB_MATRIX),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+KB_MATRIX_VERSION = 4
+
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def matrix_source(conn: sqlite3.Connection) -> str:
+    """kb_matrix yoki (migratsiya 4 gacha bo'lgan bazada) unga teng JOIN so'rovi.
+
+    Faqat o'qiydigan vositalar (eksport, ommaviy tashxis) bazani migratsiya qilmaydi.
+    """
+    if get_schema_version(conn) >= KB_MATRIX_VERSION:
+        return "kb_matrix"
+    return f"({MATRIX_SELECT})"
+
+
+def migrate(conn: sqlite3.Connection) -> int:
+    """Bajarilmagan migratsiyalarni ketma-ket qo'llash; yangi versiyani qaytaradi"""
+    current = get_schema_version(conn)
+    applied = False
+    for version, description, statements in MIGRATIONS:
+        if version <= current:
+            continue
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Boshqa jarayon shu orada migratsiyani bajargan bo'lishi mumkin
+            current = get_schema_version(conn)
+            if version <= current:
+                conn.commit()
+                continue
+            for statement in statements:
+                conn.execute(statement)
+            conn.execute(f"PRAGMA user_version = {int(version)}")
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            logger.exception("Migratsiya %d (%s) bajarilmadi", version, description)
+            raise
+        logger.info("Migratsiya %d (%s) qo'llandi", version, description)
+        current = version
+        applied = True
+
+    if applied:
+        # So'rovlar rejalashtiruvchisi yangi indekslardan foydalanishi uchun
+        conn.execute("ANALYZE")
+        conn.commit()
+    return current
+
+
+_bootstrapped: Set[Path] = set()
+_bootstrap_lock = threading.Lock()
+
+
+def ensure_schema(db_path: Path = DATABASE_PATH) -> None:
+    """Sxemani jarayon davomida bir marta tekshirish va kerak bo'lsa migratsiya qilish.
+
+    Streamlit sahifalari har qayta ishga tushganda chaqiradi; birinchi
+    muvaffaqiyatli chaqiruvdan keyin bazaga murojaat qilinmaydi.
+    """
+    db_path = Path(db_path)
+    if db_path in _bootstrapped:
+        return
+    with _bootstrap_lock:
+        if db_path not in _bootstrapped:
+            with get_connection(db_path) as conn:
+                migrate(conn)
+            _bootstrapped.add(db_path)
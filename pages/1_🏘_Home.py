@@ -1,70 +1,25 @@
 import sqlite3
+import uuid
+from datetime import datetime
 import streamlit as st
-import pandas as pd
-from io import BytesIO
-import openpyxl
-from openpyxl.styles import Font, Alignment, Border, Side
-from contextlib import contextmanager
+from database import PAGE_SIZE, Delta, cascade_delete, fetch_page, get_connection, load_snapshot, save_symptom_matrix, update_field, upsert_value
+from change_notifier import get_change_notifier
+from kb_cache import apply_delta, insert_missing, kb_cache, typeahead_options
+from migrations import ensure_schema
+from app_logging import bind_log_context, configure_logging
+from query_stats import query_stats
 from streamlit_tags import st_tags
 
-# Thread-safe database connection management
-@contextmanager
-def get_connection():
-    conn = None
-    try:
-        conn = sqlite3.connect('data/diagnosis_data.db', timeout=10, check_same_thread=False)
-        yield conn
-    finally:
-        if conn:
-            conn.close()
+# Shu qayta ishga tushirishdagi SQL so'rovlari jamini hisoblash va jurnal konteksti
+configure_logging()
+rerun = query_stats.begin_rerun("Home")
+bind_log_context(st.session_state.setdefault('session_id', uuid.uuid4().hex[:12]),
+                 st.session_state.get('user_role'), rerun.rerun_id)
 
-# Jadvalni yaratish
+# Jadvallarni yaratish va sxemani oxirgi versiyaga migratsiya qilish (jarayon davomida bir marta)
 def create_tables():
     try:
-        with get_connection() as conn:
-            cursor = conn.cursor()
-            
-            # 'diseases' jadvalini yaratish
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS diseases (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT NOT NULL
-                )
-            """)
-
-            # 'symptom_groups' jadvalini yaratish
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS symptom_groups (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    disease_id INTEGER NOT NULL,
-                    group_name TEXT NOT NULL,
-                    FOREIGN KEY(disease_id) REFERENCES diseases(id)
-                )
-            """)
-
-            # 'symptoms' jadvalini yaratish
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS symptoms (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    group_id INTEGER NOT NULL,
-                    symptom_name TEXT NOT NULL,
-                    FOREIGN KEY(group_id) REFERENCES symptom_groups(id)
-                )
-            """)
-
-            # 'disease_symptoms' jadvalini yaratish
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS disease_symptoms (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    disease_id INTEGER NOT NULL,
-                    symptom_id INTEGER NOT NULL,
-                    value INTEGER NOT NULL,
-                    FOREIGN KEY(disease_id) REFERENCES diseases(id),
-                    FOREIGN KEY(symptom_id) REFERENCES symptoms(id)
-                )
-            """)
-
-            conn.commit()
+        ensure_schema()
     except sqlite3.Error as e:
         st.error(f"Jadvallarni yaratishda xatolik yuz berdi: {str(e)}")
 
@@ -74,52 +29,25 @@ create_tables()
 # Ma'lumotlarni olish funksiyasi
 def get_all_data():
     with get_connection() as conn:
-        cursor = conn.cursor()
-        
-        # Kasalliklarni olish
-        diseases = cursor.execute("SELECT id, name FROM diseases").fetchall()
-        
-        # Simptom guruhlarini olish
-        groups = cursor.execute(""" 
-            SELECT sg.id, sg.disease_id, sg.group_name, d.name as disease_name 
-            FROM symptom_groups sg 
-            JOIN diseases d ON sg.disease_id = d.id
-        """).fetchall()
-        
-        # Simptomlarni olish
-        symptoms = cursor.execute(""" 
-            SELECT s.id, s.group_id, s.symptom_name, sg.group_name 
-            FROM symptoms s 
-            JOIN symptom_groups sg ON s.group_id = sg.id
-        """).fetchall()
-        
-        # Qiymatlarni olish va to'g'ri filtrlash
-        values = cursor.execute(""" 
-            SELECT ds.id, ds.disease_id, ds.symptom_id, ds.value,
-                d.name as disease_name, s.symptom_name, sg.group_name
-            FROM disease_symptoms ds 
-            JOIN diseases d ON ds.disease_id = d.id 
-            JOIN symptoms s ON ds.symptom_id = s.id 
-            JOIN symptom_groups sg ON s.group_id = sg.id
-        """).fetchall()
-        
-        return diseases, groups, symptoms, values
+        return load_snapshot(conn)
     
 # Keshni tozalash funksiyasi
 def clear_cache():
-    """Ma'lumotlar bazasidan keyin keshni tozalash"""
-    if 'cached_data' in st.session_state:
-        del st.session_state['cached_data']
+    """Ma'lumotlar bazasidan keyin keshni tozalash (barcha sessiyalar uchun versiya oshiriladi)"""
+    kb_cache.invalidate()
+    refresh_data()
+
+# Yozuv natijasini umumiy keshga qo'llash (faqat o'zgargan qatorlar) va sessiya nusxasini yangilash
+def apply_changes(delta, conn=None):
+    apply_delta(delta, conn)
     refresh_data()
 
 def update_data(table, field, value, condition_field, condition_value):
     try:
+        delta = Delta()
         with get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute(f"UPDATE {table} SET {field}=? WHERE {condition_field}=?", 
-                        (value, condition_value))
-            conn.commit()
-        clear_cache()  # Keshni tozalash
+            update_field(conn, table, field, value, condition_field, condition_value, delta)
+        apply_changes(delta)
         return True
     except sqlite3.Error as e:
         st.error(f"Xatolik yuz berdi: {str(e)}")
@@ -127,35 +55,11 @@ def update_data(table, field, value, condition_field, condition_value):
 
 def delete_data(table, condition_field, condition_value):
     try:
+        delta = Delta()
         with get_connection() as conn:
-            cursor = conn.cursor()
-            # Bog'liq ma'lumotlarni o'chirish
-            if table == "diseases":
-                # Kasallik o'chirilganda unga bog'liq barcha ma'lumotlarni o'chirish
-                cursor.execute("SELECT id FROM symptom_groups WHERE disease_id=?", (condition_value,))
-                group_ids = [row[0] for row in cursor.fetchall()]
-                
-                for group_id in group_ids:
-                    cursor.execute("DELETE FROM symptoms WHERE group_id=?", (group_id,))
-                
-                cursor.execute("DELETE FROM symptom_groups WHERE disease_id=?", (condition_value,))
-                cursor.execute("DELETE FROM disease_symptoms WHERE disease_id=?", (condition_value,))
-            
-            elif table == "symptom_groups":
-                # Guruh o'chirilganda unga bog'liq simptomlarni o'chirish
-                cursor.execute("SELECT id FROM symptoms WHERE group_id=?", (condition_value,))
-                symptom_ids = [row[0] for row in cursor.fetchall()]
-                
-                for symptom_id in symptom_ids:
-                    cursor.execute("DELETE FROM disease_symptoms WHERE symptom_id=?", (symptom_id,))
-                
-                cursor.execute("DELETE FROM symptoms WHERE group_id=?", (condition_value,))
-            
-            # Asosiy jadvaldan o'chirish
-            cursor.execute(f"DELETE FROM {table} WHERE {condition_field}=?", (condition_value,))
-            conn.commit()
-            
-        clear_cache()  # Keshni tozalash
+            # Bog'liq ma'lumotlar bilan birga bitta tranzaksiyada o'chirish
+            cascade_delete(conn, table, condition_field, condition_value, delta)
+        apply_changes(delta)
         return True
     except sqlite3.Error as e:
         st.error(f"Xatolik yuz berdi: {str(e)}")
@@ -164,69 +68,81 @@ def delete_data(table, condition_field, condition_value):
 def update_symptom_value(disease_id, symptom_id, new_value):
     """Simptom qiymatini yangilash"""
     try:
+        delta = Delta()
         with get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute(""" 
-                INSERT OR REPLACE INTO disease_symptoms (disease_id, symptom_id, value) 
-                VALUES (?, ?, ?)
-            """, (disease_id, symptom_id, new_value))
-            conn.commit()
-        clear_cache()
+            # Unikal (disease_id, symptom_id) kaliti bo'yicha joyida yangilash
+            upsert_value(conn, disease_id, symptom_id, new_value, delta)
+        apply_changes(delta)
         return True
     except sqlite3.Error as e:
         st.error(f"Qiymatni yangilashda xatolik: {str(e)}")
         return False
 
-# Session state orqali ma'lumotlarni saqlash
-if 'cached_data' not in st.session_state:
-    st.session_state.cached_data = get_all_data()
-
 def refresh_data():
-    st.session_state.cached_data = get_all_data()
+    # Sessiya o'z nusxasini emas, jarayon bo'yicha umumiy nusxaga havolani saqlaydi
+    st.session_state.kb_version, st.session_state.cached_data = kb_cache.get(get_all_data)
+
+# Boshqa ishchi jarayon bazaga yozgan bo'lsa umumiy kesh eskirgan deb belgilanadi
+get_change_notifier().poll()
+
+# Session state faqat bilimlar bazasi versiyasi o'zgarganda yangilanadi
+if st.session_state.get('kb_version') != kb_cache.version:
+    refresh_data()
+
+# Simptom -> kasallik indeksi har bir versiya uchun bir marta, barcha sessiyalar uchun quriladi
+def get_symptom_index():
+    from diagnosis_engine import CATALOG_PATH, load_index
+
+    return kb_cache.derive('symptom_index', get_all_data,
+                           lambda data: load_index(data[0], data[3], CATALOG_PATH))
 
 # Kasallik va guruhni tekshirish
 def check_and_insert_disease(conn, disease_name):
-    cursor = conn.cursor()
-    cursor.execute("SELECT id FROM diseases WHERE name=?", (disease_name,))
-    disease_record = cursor.fetchone()
-    if not disease_record:
-        cursor.execute("INSERT INTO diseases (name) VALUES (?)", (disease_name,))
-        conn.commit()
-        return cursor.lastrowid
-    return disease_record[0]
-
-# Guruhni tekshirish va qo'shish
+    try:
+        disease_id = insert_missing(conn, 'diseases', {'name': disease_name})
+    except sqlite3.Error as e:
+        st.error(f"Kasallikni qo'shishda xatolik: {str(e)}")
+        return None
+    refresh_data()
+    return disease_id
+
+# Guruhni tekshirish va qo'shish (disease_id - kasallik id si, nomi emas)
 def check_and_insert_group(conn, disease_id, group_name):
-    cursor = conn.cursor()
-    cursor.execute("SELECT id FROM symptom_groups WHERE disease_id=? AND group_name=?", (disease_id, group_name))
-    group_record = cursor.fetchone()
-    if not group_record:
-        cursor.execute("INSERT INTO symptom_groups (disease_id, group_name) VALUES (?, ?)", (disease_id, group_name))
-        conn.commit()
-        return cursor.lastrowid
-    return group_record[0]
-
-# Simptomni tekshirish va qo'shish
+    try:
+        group_id = insert_missing(conn, 'symptom_groups', {'disease_id': disease_id, 'group_name': group_name})
+    except sqlite3.Error as e:
+        st.error(f"Guruhni qo'shishda xatolik: {str(e)}")
+        return None
+    refresh_data()
+    return group_id
+
+# Simptomni tekshirish va qo'shish (group_id - guruh id si, nomi emas)
 def check_and_insert_symptom(conn, group_id, symptom_name):
-    cursor = conn.cursor()
-    cursor.execute("SELECT id FROM symptoms WHERE group_id=? AND symptom_name=?", (group_id, symptom_name))
-    symptom_record = cursor.fetchone()
-    if not symptom_record:
-        cursor.execute("INSERT INTO symptoms (group_id, symptom_name) VALUES (?, ?)", (group_id, symptom_name))
-        conn.commit()
-        return cursor.lastrowid
-    return symptom_record[0]
+    try:
+        symptom_id = insert_missing(conn, 'symptoms', {'group_id': group_id, 'symptom_name': symptom_name})
+    except sqlite3.Error as e:
+        st.error(f"Simptomni qo'shishda xatolik: {str(e)}")
+        return None
+    refresh_data()
+    return symptom_id
 
 # Qiymatlarni saqlash
 def save_symptom_value(conn, disease_id, symptom_id, value):
-    cursor = conn.cursor()
-    cursor.execute("SELECT id FROM disease_symptoms WHERE disease_id=? AND symptom_id=?", (disease_id, symptom_id))
-    existing_value = cursor.fetchone()
-    if existing_value:
-        cursor.execute("UPDATE disease_symptoms SET value=? WHERE disease_id=? AND symptom_id=?", (value, disease_id, symptom_id))
-    else:
-        cursor.execute("INSERT INTO disease_symptoms (disease_id, symptom_id, value) VALUES (?, ?, ?)", (disease_id, symptom_id, value))
-    conn.commit()
+    try:
+        delta = Delta()
+        upsert_value(conn, disease_id, symptom_id, value, delta)
+        apply_changes(delta, conn)
+        return True
+    except sqlite3.Error as e:
+        st.error(f"Qiymatni saqlashda xatolik: {str(e)}")
+        return False
+
+# Typeahead: brauzerga butun katalog emas, faqat yozilgan so'rovga mos natijalar yuboriladi.
+# Nom -> id lug'ati va indeks har bir versiya uchun bir marta quriladi, har qayta ishga tushishda emas
+def search_selectbox(label, key, build_options):
+    options, index = typeahead_options(key, get_all_data, build_options)
+    query = st.text_input(f"🔎 {label}", key=f"{key}_query", placeholder="Qidirish uchun yozing...")
+    return st.selectbox(label, index.search(query), key=key), options
 
 # Tahrirlash oynasi
 def edit_tab():
@@ -240,11 +156,10 @@ def edit_tab():
     if edit_type == "Kasalliklar":
         st.markdown("### Kasalliklarni qo'shish, o'zgartirish yoki o'chirish")
         
-        # Kasalliklar ro'yxatini olish
-        disease_dict = {d[1]: d[0] for d in diseases}
-        
         # Kasallikni tanlash
-        selected_disease = st.selectbox("Tahrir qilmoqchi bo'lgan kasallikni tanlang", list(disease_dict.keys()))
+        selected_disease, disease_dict = search_selectbox(
+            "Tahrir qilmoqchi bo'lgan kasallikni tanlang", "pick_disease",
+            lambda data: {d[1]: d[0] for d in data[0]})
         
         # Kasallikni yangilash
         if selected_disease:
@@ -265,16 +180,16 @@ def edit_tab():
             if new_disease_name:
                 with get_connection() as conn:
                     disease_id = check_and_insert_disease(conn, new_disease_name)
-                st.success(f"✅ {new_disease_name} kasalligi qo'shildi!")
+                if disease_id is not None:
+                    st.success(f"✅ {new_disease_name} kasalligi qo'shildi!")
 
     elif edit_type == "Simptom guruhlari":
         st.markdown("### Simptom guruhlarini qo'shish, o'zgartirish yoki o'chirish")
         
-        # Simptom guruhlarini olish
-        group_dict = {group[2]: group[0] for group in groups}
-        
         # Simptom guruhini tanlash
-        selected_group = st.selectbox("Tahrir qilmoqchi bo'lgan simptom guruhini tanlang", list(group_dict.keys()))
+        selected_group, group_dict = search_selectbox(
+            "Tahrir qilmoqchi bo'lgan simptom guruhini tanlang", "pick_group",
+            lambda data: {group[2]: group[0] for group in data[1]})
         
         # Simptom guruhini yangilash
         if selected_group:
@@ -291,20 +206,23 @@ def edit_tab():
         
         # Simptom guruhini qo'shish
         new_group_name = st.text_input("Yangi simptom guruhini kiriting", key="new_group_name")
+        # Bazaga nom emas, kasallik id si yoziladi (foreign key)
+        disease_ids = {d[1]: d[0] for d in diseases}
+        group_disease = st.selectbox("Kasallikni tanlang", list(disease_ids), key="new_group_disease")
         if st.button("Simptom guruhi qo'shish"):
-            if new_group_name:
+            if new_group_name and group_disease:
                 with get_connection() as conn:
-                    disease_id = st.selectbox("Kasallikni tanlang", [d[1] for d in diseases])
-                    group_id = check_and_insert_group(conn, disease_id, new_group_name)
-                st.success(f"✅ {new_group_name} guruh qo'shildi!")
+                    group_id = check_and_insert_group(conn, disease_ids[group_disease], new_group_name)
+                if group_id is not None:
+                    st.success(f"✅ {new_group_name} guruh qo'shildi!")
 
     elif edit_type == "Simptomlar":
         st.markdown("### Simptomlarni qo'shish, o'zgartirish yoki o'chirish")
         
-        symptom_dict = {symptom[2]: symptom[0] for symptom in symptoms}
-        
         # Simptomni tanlash
-        selected_symptom = st.selectbox("Tahrir qilmoqchi bo'lgan simptomni tanlang", list(symptom_dict.keys()))
+        selected_symptom, symptom_dict = search_selectbox(
+            "Tahrir qilmoqchi bo'lgan simptomni tanlang", "pick_symptom",
+            lambda data: {symptom[2]: symptom[0] for symptom in data[2]})
         
         # Simptomni yangilash
         if selected_symptom:
@@ -321,20 +239,23 @@ def edit_tab():
         
         # Simptomni qo'shish
         new_symptom_name = st.text_input("Yangi simptomni kiriting", key="new_symptom_name")
+        # Bazaga nom emas, guruh id si yoziladi (foreign key)
+        group_ids = {g[2]: g[0] for g in groups}
+        symptom_group = st.selectbox("Simptom guruhini tanlang", list(group_ids), key="new_symptom_group")
         if st.button("Simptom qo'shish"):
-            if new_symptom_name:
+            if new_symptom_name and symptom_group:
                 with get_connection() as conn:
-                    group_id = st.selectbox("Simptom guruhini tanlang", [g[2] for g in groups])
-                    symptom_id = check_and_insert_symptom(conn, group_id, new_symptom_name)
-                st.success(f"✅ {new_symptom_name} simptom qo'shildi!")
+                    symptom_id = check_and_insert_symptom(conn, group_ids[symptom_group], new_symptom_name)
+                if symptom_id is not None:
+                    st.success(f"✅ {new_symptom_name} simptom qo'shildi!")
 
     elif edit_type == "Qiymatlar":
         st.markdown("### Qiymatlarni qo'shish, o'zgartirish yoki o'chirish")
         
-        values_dict = {f"{v[4]} - {v[5]} ({v[6]})": v[0] for v in values}
-        
         # Qiymatni tanlash
-        selected_value = st.selectbox("Tahrir qilmoqchi bo'lgan qiymatni tanlang", list(values_dict.keys()))
+        selected_value, values_dict = search_selectbox(
+            "Tahrir qilmoqchi bo'lgan qiymatni tanlang", "pick_value",
+            lambda data: {f"{v[4]} - {v[5]} ({v[6]})": v[0] for v in data[3]})
         
         # Qiymatni yangilash
         if selected_value:
@@ -351,18 +272,27 @@ def edit_tab():
         
         # Qiymatni qo'shish
         new_value = st.number_input("Yangi qiymatni kiriting", value=1, min_value=0, max_value=1, key='new_value')
+        # Bazaga nomlar emas, kasallik va simptom id lari yoziladi (foreign key)
+        disease_ids = {d[1]: d[0] for d in diseases}
+        symptom_ids = {s[2]: s[0] for s in symptoms}
+        value_disease = st.selectbox("Kasallikni tanlang", list(disease_ids), key="new_value_disease")
+        value_symptom = st.selectbox("Simptomni tanlang", list(symptom_ids), key="new_value_symptom")
         if st.button("Qiymat qo'shish"):
-            if new_value:
+            if new_value and value_disease and value_symptom:
                 with get_connection() as conn:
-                    disease_id = st.selectbox("Kasallikni tanlang", [d[1] for d in diseases])
-                    symptom_id = st.selectbox("Simptomni tanlang", [s[2] for s in symptoms])
-                    save_symptom_value(conn, disease_id, symptom_id, new_value)
-                st.success(f"✅ Qiymat qo'shildi!")
+                    saved = save_symptom_value(conn, disease_ids[value_disease], symptom_ids[value_symptom], new_value)
+                if saved:
+                    st.success(f"✅ Qiymat qo'shildi!")
 
 
 # Asosiy qism
 st.markdown("# 💉Kasalliklar bilan ishlash oynasi")
-tabs = st.tabs(["Ma'lumotlarni kiritish", "Ma'lumotlarni tahrirlash", "Excelga eksport qilish"])
+tab_names = ["Ma'lumotlarni kiritish", "Ma'lumotlarni tahrirlash", "Excelga eksport qilish", "Tashxis qo'yish"]
+# Diagnostika paneli faqat administratorlarga ko'rinadi
+is_admin = st.session_state.get('user_role') == 'Administrator'
+if is_admin:
+    tab_names.append("Diagnostika")
+tabs = st.tabs(tab_names)
 
 with tabs[0]:  
     # 'st_tags' orqali kasallik nomlarini kiritish  
@@ -424,46 +354,11 @@ with tabs[0]:
 
         if saqlash:  
             try:  
-                with get_connection() as conn:  
-                    cursor = conn.cursor()  
-
-                    # Simptomlar va kasalliklarga mos qiymatlarni bazaga saqlash  
-                    for record in symptom_matrix:  
-                        kasallik, group, symptom, value = record  
-
-                        # Kasallikni olish yoki yaratish  
-                        cursor.execute("SELECT id FROM diseases WHERE name=?", (kasallik,))  
-                        disease_record = cursor.fetchone()  
-                        if not disease_record:  
-                            cursor.execute("INSERT INTO diseases (name) VALUES (?)", (kasallik,))  
-                            conn.commit()  
-                            disease_id = cursor.lastrowid  
-                        else:  
-                            disease_id = disease_record[0]  
-
-                        # Simptomni olish yoki yaratish  
-                        cursor.execute("SELECT id FROM symptom_groups WHERE disease_id=? AND group_name=?", (disease_id, group))  
-                        group_record = cursor.fetchone()  
-                        if not group_record:  
-                            cursor.execute("INSERT INTO symptom_groups (disease_id, group_name) VALUES (?, ?)", (disease_id, group))  
-                            conn.commit()  
-                            group_id = cursor.lastrowid  
-                        else:  
-                            group_id = group_record[0]  
-
-                        cursor.execute("SELECT id FROM symptoms WHERE group_id=? AND symptom_name=?", (group_id, symptom))  
-                        symptom_record = cursor.fetchone()  
-                        if not symptom_record:  
-                            cursor.execute("INSERT INTO symptoms (group_id, symptom_name) VALUES (?, ?)", (group_id, symptom))  
-                            conn.commit()  
-                            symptom_id = cursor.lastrowid  
-                        else:  
-                            symptom_id = symptom_record[0]  
-
-                        # Qiymatni saqlash (1 yoki 0)  
-                        cursor.execute("""INSERT INTO disease_symptoms (disease_id, symptom_id, value)  
-                                          VALUES (?, ?, ?)""", (disease_id, symptom_id, value))  
-                        conn.commit()  
+                delta = Delta()
+                with get_connection() as conn:
+                    # Simptomlar va kasalliklarga mos qiymatlarni bitta tranzaksiyada saqlash
+                    save_symptom_matrix(conn, symptom_matrix, delta)
+                apply_changes(delta)
 
                 st.success("✅ Kasalliklar va simptomlar muvaffaqiyatli saqlandi!")  
             except sqlite3.Error as e:  
@@ -472,89 +367,149 @@ with tabs[0]:
 with tabs[1]:
     edit_tab()
 
-def export_to_excel():
-    diseases, groups, symptoms, values = get_all_data()
-    
-    # Excel yaratish
-    workbook = openpyxl.Workbook()
-    worksheet = workbook.active
-    worksheet.title = "Kasalliklar va Simptomlar"
-
-    # Stil yaratish
-    header_font = Font(name='Times New Roman', size=14, bold=True)
-    cell_font = Font(name='Times New Roman', size=14)
-    cell_alignment = Alignment(horizontal='center', vertical='center')
-    border = Border(left=Side(style='thin'), right=Side(style='thin'),
-                top=Side(style='thin'), bottom=Side(style='thin'))
-
-    # Sarlavhalar
-    headers = ['Simptomlar Guruhi', 'Simptom'] + [d[1] for d in diseases]
-    for col, header in enumerate(headers, 1):
-        cell = worksheet.cell(row=1, column=col)
-        cell.value = header
-        cell.font = header_font
-        cell.alignment = cell_alignment
-        cell.border = border
-
-    # Ma'lumotlarni to'ldirish
-    current_row = 2
-    for symptom in symptoms:
-        worksheet.cell(row=current_row, column=1, value=symptom[3]).font = cell_font
-        worksheet.cell(row=current_row, column=1).alignment = cell_alignment
-        worksheet.cell(row=current_row, column=1).border = border
-        
-        worksheet.cell(row=current_row, column=2, value=symptom[2]).font = cell_font
-        worksheet.cell(row=current_row, column=2).alignment = cell_alignment
-        worksheet.cell(row=current_row, column=2).border = border
-        
-        for col, disease in enumerate(diseases, 3):
-            cell = worksheet.cell(row=current_row, column=col)
-            value = next((v[3] for v in values 
-                        if v[1] == disease[0] and v[2] == symptom[0]), 0)
-            cell.value = value
-            cell.font = cell_font
-            cell.alignment = cell_alignment
-            cell.border = border
-        
-        current_row += 1
-    # Ustunlarni kengaytirish
-    for column in worksheet.columns:
-        max_length = max(len(str(cell.value)) for cell in column)
-        worksheet.column_dimensions[column[0].column_letter].width = max_length + 4
-    return workbook
+def export_to_excel(data=None):
+    # openpyxl faqat eksport haqiqatan so'ralganda yuklanadi
+    from excel_export import build_workbook
+
+    diseases, groups, symptoms, values = data or st.session_state.cached_data
+    # Excel yaratish (kataklar oldindan qurilgan pivot lug'atidan olinadi)
+    return build_workbook(diseases, symptoms, values)
+
+# Excel fayli faqat so'ralganda quriladi va bilimlar bazasi versiyasi bo'yicha keshlanadi
+def get_excel_bytes():
+    from excel_export import workbook_bytes
+
+    return kb_cache.derive('excel_export', get_all_data,
+                           lambda data: workbook_bytes(export_to_excel(data)).getvalue())
+
+# st.tabs ichidagi barcha bo'limlar har qayta ishga tushishda bajariladi: jadvallar pandas
+# o'rniga lug'atlar ro'yxati sifatida beriladi, shunda pandas sahifada umuman yuklanmaydi
+def table_records(rows, columns):
+    return [dict(zip(columns, row)) for row in rows]
+
+# Jadvalni sahifalab ko'rsatish: bazadan faqat joriy sahifa o'qiladi.
+# Sessiyada har bir sahifa boshlanadigan id lar steki saqlanadi ("Oldingi" uchun)
+def paged_table(table, columns, key):
+    cursors_key = f"{key}_cursors"
+
+    def reset_pages():
+        st.session_state[cursors_key] = [0]
+
+    search = st.text_input("🔎 Filtr", key=f"{key}_filter", on_change=reset_pages,
+                           placeholder="Nom bo'yicha qidirish...")
+    cursors = st.session_state.setdefault(cursors_key, [0])
+    with get_connection() as conn:
+        rows, has_next = fetch_page(conn, table, after_id=cursors[-1], limit=PAGE_SIZE, search=search)
+
+    st.data_editor(table_records(rows, columns), key=f"{key}_editor")
+
+    col_prev, col_page, col_next = st.columns([1, 2, 1])
+    if col_prev.button("⬅️ Oldingi", key=f"{key}_prev", disabled=len(cursors) == 1, use_container_width=True):
+        cursors.pop()
+        st.rerun()
+    col_page.caption(f"{len(cursors)}-sahifa")
+    if col_next.button("Keyingi ➡️", key=f"{key}_next", disabled=not has_next, use_container_width=True):
+        cursors.append(rows[-1][0])
+        st.rerun()
 
 with tabs[2]:
     st.markdown("## Ma'lumotlar bazasidagi ma'lumotlar")
-    # Ma'lumotlarni olish
-    diseases, groups, symptoms, values = get_all_data()
     tabDiseases, tabGroups, tabSymptom, tabValues = st.tabs(['Kasalliklar', 'Simptom guruhlari', 'Simptomlar', 'Qiymatlar'])
     
     with tabDiseases:
         # Kasalliklar jadvalini ko'rsatish
-        st.data_editor(pd.DataFrame(diseases, columns=["T/R", "Kasallik nomi"]))
+        paged_table("diseases", ["T/R", "Kasallik nomi"], key="page_diseases")
     with tabGroups:
     # Simptom guruhlari jadvalini ko'rsatish
-        st.data_editor(pd.DataFrame(groups, columns=["ID", "Kasallik ID", "Guruh nomi", "Kasallik nomi"]))
+        paged_table("symptom_groups", ["ID", "Kasallik ID", "Guruh nomi", "Kasallik nomi"], key="page_groups")
 
     with tabSymptom:
     # Simptomlar jadvalini ko'rsatish
-        st.data_editor(pd.DataFrame(symptoms, columns=["ID", "Guruh ID", "Simptom nomi", "Guruh nomi"]))
+        paged_table("symptoms", ["ID", "Guruh ID", "Simptom nomi", "Guruh nomi"], key="page_symptoms")
 
     with tabValues:
     # Qiymatlar jadvalini ko'rsatish
-        st.data_editor(pd.DataFrame(values, columns=["ID", "Kasallik ID", "Simptom ID", "Qiymat", "Kasallik nomi", "Simptom nomi", "Guruh nomi"]))
+        paged_table("disease_symptoms", ["ID", "Kasallik ID", "Simptom ID", "Qiymat", "Kasallik nomi", "Simptom nomi", "Guruh nomi"], key="page_values")
     
-    # Excelga eksport qilish funksiyasini chaqirish
-    workbook = export_to_excel()
-    excel_file = BytesIO()
-    workbook.save(excel_file)
-    excel_file.seek(0)
-    st.download_button(
-        label="Jadval ko'rinishida yuklash",
-        data=excel_file,
-        file_name="kasalliklar_va_simptomlar.xlsx",
-        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        use_container_width=True,
-        icon='💾',
-        type='primary'
-    )
+    # Excel fayli faqat tugma bosilganda tayyorlanadi; keyingi qayta ishga tushishlarda keshdan olinadi
+    excel_bytes = kb_cache.peek('excel_export')
+    if excel_bytes is None and st.button("Excel faylini tayyorlash", icon='⚙️', use_container_width=True):
+        excel_bytes = get_excel_bytes()
+    if excel_bytes is not None:
+        st.download_button(
+            label="Jadval ko'rinishida yuklash",
+            data=excel_bytes,
+            file_name="kasalliklar_va_simptomlar.xlsx",
+            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            use_container_width=True,
+            icon='💾',
+            type='primary'
+        )
+
+    # Oflayn tahrirlangan eksport faylini qayta yuklash: faqat o'zgargan kataklar yoziladi
+    st.markdown("### Excel faylidan import qilish")
+    uploaded_file = st.file_uploader("Tahrirlangan kasalliklar_va_simptomlar.xlsx faylini yuklang", type=['xlsx'])
+    if uploaded_file is not None and st.button("Import qilish", icon='📥', use_container_width=True):
+        from excel_import import INVALID_WORKBOOK_ERRORS, import_workbook
+
+        try:
+            with get_connection() as conn:
+                report = import_workbook(conn, uploaded_file)
+            if report.changed:
+                clear_cache()
+            st.success(f"✅ {report.values_added} ta qiymat qo'shildi, {report.values_changed} ta o'zgartirildi, "
+                       f"{report.values_unchanged} ta o'zgarishsiz qoldi")
+            if report.invalid_cells:
+                st.warning(f"{report.invalid_cells} ta katakda 0 yoki 1 dan boshqa qiymat bor, ular o'tkazib yuborildi")
+            if report.unmatched_rows or report.unmatched_columns:
+                st.warning("Bazada topilmadi: " + ", ".join(report.unmatched_columns + report.unmatched_rows))
+        except (ValueError, sqlite3.Error, *INVALID_WORKBOOK_ERRORS) as e:
+            st.error(f"Importda xatolik yuz berdi: {str(e)}")
+
+with tabs[3]:
+    st.markdown("## Bemorga birlamchi tashxis qo'yish")
+    index = get_symptom_index()
+    selected_symptoms = st.multiselect("Bemordagi simptomlarni tanlang", index.symptom_names, key="diagnosis_symptoms")
+    top_k = st.number_input("Nechta tashxis ko'rsatilsin?", 1, max(len(index.disease_names), 1), min(5, max(len(index.disease_names), 1)))
+
+    if selected_symptoms:
+        # Faqat tanlangan simptomlar postinglari ko'rib chiqiladi
+        results = index.rank(selected_symptoms, top_k)
+        st.dataframe(table_records(results, ["Kasallik", "Ball", "Mos simptomlar"]),
+                     use_container_width=True, hide_index=True)
+
+# So'rovlar statistikasi: eng ko'p vaqt olgan so'rovlar, sekin so'rovlar va qayta ishga tushirishlar jami
+def diagnostics_panel():
+    st.markdown("## So'rovlar diagnostikasi")
+    rerun = query_stats.current_rerun()
+    if rerun is not None:
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Shu qayta ishga tushirishdagi so'rovlar", rerun.queries)
+        col2.metric("Umumiy vaqt (ms)", f"{rerun.total_ms:.1f}")
+        col3.metric("Qatorlar", rerun.rows)
+
+    st.markdown("### So'rovlar (gistogramma bo'yicha p50/p95)")
+    st.dataframe(query_stats.snapshot(),
+                 use_container_width=True, hide_index=True)
+
+    st.markdown(f"### Sekin so'rovlar ({query_stats.slow_query_ms:g} ms dan uzoq)")
+    st.dataframe(table_records([(datetime.fromtimestamp(q.at), q.sql, q.elapsed_ms, q.rows)
+                                for q in reversed(query_stats.slow_queries)],
+                               ['Vaqt', 'SQL', 'ms', 'Qatorlar']),
+                 use_container_width=True, hide_index=True)
+
+    st.markdown("### Oxirgi qayta ishga tushirishlar")
+    st.dataframe(table_records([(datetime.fromtimestamp(r.started), r.page, r.rerun_id, r.queries, r.total_ms, r.rows)
+                                for r in reversed(query_stats.recent_reruns)],
+                               ['Vaqt', 'Sahifa', 'ID', "So'rovlar", 'ms', 'Qatorlar']),
+                 use_container_width=True, hide_index=True)
+
+    st.caption(f"Navbat to'lgani sababli yozilmagan jurnal yozuvlari: {configure_logging().dropped}")
+
+    if st.button("Statistikani tozalash", icon='🧹', use_container_width=True):
+        query_stats.reset()
+        st.rerun()
+
+if is_admin:
+    with tabs[4]:
+        diagnostics_panel()
@@ -0,0 +1,244 @@
+"""SQL so'rovlari kechikishini o'lchash va sekin so'rovlar jurnali.
+
+Puldagi barcha ulanishlar ``InstrumentedConnection`` orqali ochiladi: har bir
+so'rov (bajarish + natijani o'qish) vaqti, qatorlar soni va kechikish
+gistogrammasi jarayon bo'yicha umumiy ``query_stats`` ga yoziladi.
+``SLOW_QUERY_MS`` dan uzoq davom etgan so'rovlar ``slow_queries`` jurnaliga
+tushadi (fayl ``app_logging`` da sozlanadi).
+
+Streamlit har bir qayta ishga tushirishni alohida oqimda bajaradi; sahifa
+boshida ``begin_rerun()`` chaqirilsa, shu oqimdagi so'rovlar jami ham hisoblanadi.
+"""
+import logging
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from collections import deque
+from functools import lru_cache
+from typing import Deque, Dict, List, NamedTuple, Optional
+
+SLOW_QUERY_MS = 100
+# Gistogramma chegaralari (ms); oxirgi katak undan kattalar uchun
+LATENCY_BUCKETS_MS = (0.1, 0.5, 1, 5, 10, 50, 100, 500, 1000)
+RECENT_SLOW_QUERIES = 100
+RECENT_RERUNS = 50
+
+WHITESPACE = re.compile(r"\s+")
+# select_in() har xil uzunlikdagi IN (?, ?, ...) ro'yxatlarini bitta so'rov sifatida sanash uchun
+PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+
+slow_logger = logging.getLogger('slow_queries')
+
+
+@lru_cache(maxsize=2048)
+def normalize_sql(sql: str) -> str:
+    return PLACEHOLDER_LIST.sub('(?, ...)', WHITESPACE.sub(' ', sql).strip())
+
+
+class StatementStats:
+    __slots__ = ('count', 'total_ms', 'max_ms', 'rows', 'histogram')
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.rows = 0
+        self.histogram = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+
+    def percentile(self, q: float) -> float:
+        """Gistogramma bo'yicha taxminiy persentil (katak yuqori chegarasi, ms)"""
+        target = q * self.count
+        seen = 0
+        for bound, hits in zip(LATENCY_BUCKETS_MS + (self.max_ms,), self.histogram):
+            seen += hits
+            if hits and seen >= target:
+                return min(bound, self.max_ms)
+        return self.max_ms
+
+
+class SlowQuery(NamedTuple):
+    at: float
+    sql: str
+    elapsed_ms: float
+    rows: int
+
+
+class RerunTotals:
+    __slots__ = ('page', 'rerun_id', 'started', 'queries', 'total_ms', 'rows')
+
+    def __init__(self, page: str):
+        self.page = page
+        self.rerun_id = uuid.uuid4().hex[:12]
+        self.started = time.time()
+        self.queries = 0
+        self.total_ms = 0.0
+        self.rows = 0
+
+
+class QueryStats:
+    """Jarayon bo'yicha umumiy so'rov statistikasi"""
+
+    def __init__(self, slow_query_ms: float = SLOW_QUERY_MS):
+        self.slow_query_ms = slow_query_ms
+        self._lock = threading.Lock()
+        self._statements: Dict[str, StatementStats] = {}
+        self.slow_queries: Deque[SlowQuery] = deque(maxlen=RECENT_SLOW_QUERIES)
+        self.recent_reruns: Deque[RerunTotals] = deque(maxlen=RECENT_RERUNS)
+        self._local = threading.local()
+
+    def record(self, sql: str, elapsed_ms: float, rows: int):
+        key = normalize_sql(sql)
+        with self._lock:
+            stats = self._statements.get(key)
+            if stats is None:
+                stats = self._statements[key] = StatementStats()
+            stats.count += 1
+            stats.total_ms += elapsed_ms
+            stats.max_ms = max(stats.max_ms, elapsed_ms)
+            stats.rows += rows
+            stats.histogram[bisect_left(LATENCY_BUCKETS_MS, elapsed_ms)] += 1
+            if elapsed_ms >= self.slow_query_ms:
+                self.slow_queries.append(SlowQuery(time.time(), key, elapsed_ms, rows))
+
+        totals = self.current_rerun()
+        if totals is not None:
+            totals.queries += 1
+            totals.total_ms += elapsed_ms
+            totals.rows += rows
+        if elapsed_ms >= self.slow_query_ms:
+            slow_logger.warning("%.1f ms, %d qator: %s", elapsed_ms, rows, key)
+
+    def begin_rerun(self, page: str) -> RerunTotals:
+        """Joriy oqim uchun yangi qayta ishga tushirish jamini boshlash"""
+        totals = RerunTotals(page)
+        self._local.rerun = totals
+        with self._lock:
+            self.recent_reruns.append(totals)
+        return totals
+
+    def current_rerun(self) -> Optional[RerunTotals]:
+        return getattr(self._local, 'rerun', None)
+
+    def snapshot(self) -> List[Dict]:
+        """Umumiy vaqt bo'yicha kamayish tartibida so'rovlar jadvali"""
+        with self._lock:
+            items = list(self._statements.items())
+        return sorted((
+            {
+                'sql': sql,
+                'count': s.count,
+                'total_ms': s.total_ms,
+                'mean_ms': s.total_ms / s.count,
+                'p50_ms': s.percentile(0.5),
+                'p95_ms': s.percentile(0.95),
+                'max_ms': s.max_ms,
+                'rows': s.rows,
+            } for sql, s in items), key=lambda row: row['total_ms'], reverse=True)
+
+    def reset(self):
+        with self._lock:
+            self._statements.clear()
+            self.slow_queries.clear()
+            self.recent_reruns.clear()
+
+
+# Sahifa skriptlari qayta ishga tushganda ham modul bir marta yuklanadi
+query_stats = QueryStats()
+
+
+class QueryCursor(sqlite3.Cursor):
+    """So'rov vaqtini bajarishdan natija to'liq o'qilguncha o'lchaydigan kursor"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._pending: Optional[list] = None
+
+    def _flush(self):
+        pending, self._pending = self._pending, None
+        if pending is not None:
+            query_stats.record(*pending)
+
+    def _timed(self, method, *args):
+        start = time.perf_counter()
+        try:
+            return method(*args)
+        finally:
+            if self._pending is not None:
+                self._pending[1] += (time.perf_counter() - start) * 1000
+
+    def execute(self, sql, parameters=()):
+        self._flush()
+        self._pending = [sql, 0.0, 0]
+        self._timed(super().execute, sql, parameters)
+        if self.description is None:
+            # INSERT/UPDATE/DELETE: o'qiladigan natija yo'q
+            self._pending[2] = max(self.rowcount, 0)
+            self._flush()
+        return self
+
+    def executemany(self, sql, seq_of_parameters):
+        self._flush()
+        self._pending = [sql, 0.0, 0]
+        self._timed(super().executemany, sql, seq_of_parameters)
+        self._pending[2] = max(self.rowcount, 0)
+        self._flush()
+        return self
+
+    def executescript(self, sql_script):
+        self._flush()
+        self._pending = [sql_script, 0.0, 0]
+        self._timed(super().executescript, sql_script)
+        self._flush()
+        return self
+
+    def fetchone(self):
+        row = self._timed(super().fetchone)
+        if self._pending is not None:
+            if row is None:
+                self._flush()
+            else:
+                self._pending[2] += 1
+        return row
+
+    def fetchmany(self, size=None):
+        size = self.arraysize if size is None else size
+        rows = self._timed(super().fetchmany, size)
+        if self._pending is not None:
+            self._pending[2] += len(rows)
+            if len(rows) < size:
+                self._flush()
+        return rows
+
+    def fetchall(self):
+        rows = self._timed(super().fetchall)
+        if self._pending is not None:
+            self._pending[2] += len(rows)
+            self._flush()
+        return rows
+
+    def close(self):
+        self._flush()
+        super().close()
+
+    def __del__(self):
+        # Natijasi oxirigacha o'qilmagan kursor (masalan, faqat fetchone()) ham hisobga olinadi
+        if getattr(self, '_pending', None) is not None:
+            self._flush()
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    def cursor(self, factory=QueryCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self.cursor().executescript(sql_script)
+
@@ -0,0 +1,208 @@
+"""Kirish urinishlarini jarayon (va ixtiyoriy ravishda jarayonlar) bo'yicha cheklash.
+
+Har bir kalit (rol + login) uchun ikki bo'lakli siljuvchi oyna hisoblagichi
+saqlanadi: joriy va oldingi oynadagi xatolar soni. Taxminiy urinishlar soni
+``oldingi * (1 - o'tgan_vaqt / oyna) + joriy`` bo'lib, chegaradan oshsa kalit
+ma'lum muddatga bloklanadi. Bloklangan kalitni tekshirish xotiradan O(1) da
+bajariladi va foydalanuvchilar bazasiga umuman murojaat qilmaydi.
+
+SQLite ombori berilsa, holat alohida faylda saqlanadi: qayta ishga
+tushirishdan keyin ham yo'qolmaydi va bir nechta worker jarayonlari uchun umumiy bo'ladi.
+"""
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, NamedTuple, Optional
+
+from database import get_pool
+
+MAX_ATTEMPTS = 3
+WINDOW_SECONDS = 15 * 60
+BLOCK_SECONDS = 15 * 60
+# Xotirada kuzatiladigan kalitlar chegarasi: ko'p sonli turli loginlar bilan hujum xotirani to'ldirmasligi uchun
+MAX_TRACKED_KEYS = 10000
+# Ombordagi eskirgan yozuvlar har shuncha yozuvdan keyin tozalanadi
+PURGE_EVERY = 100
+
+
+class WindowState(NamedTuple):
+    window_start: float
+    current: int = 0
+    previous: int = 0
+    blocked_until: float = 0.0
+
+
+def _slide(state: WindowState, now: float, window: float) -> WindowState:
+    """Oynani joriy vaqtga surish: o'tib ketgan oyna hisoblagichi "oldingi" ga o'tadi"""
+    elapsed = now - state.window_start
+    if elapsed < window:
+        return state
+    if elapsed < 2 * window:
+        return state._replace(window_start=state.window_start + window, current=0, previous=state.current)
+    return state._replace(window_start=now, current=0, previous=0)
+
+
+def _estimate(state: WindowState, now: float, window: float) -> float:
+    return state.previous * (1 - (now - state.window_start) / window) + state.current
+
+
+def _expires_at(state: WindowState, window: float) -> float:
+    """Shu vaqtdan keyin yozuv hech narsaga ta'sir qilmaydi va o'chirilishi mumkin"""
+    return max(state.blocked_until, state.window_start + 2 * window)
+
+
+class SqliteRateLimitStore:
+    """Cheklovchi holatini SQLite jadvalida saqlash (foydalanuvchilar bazasidan alohida faylda)"""
+
+    SCHEMA = (
+        """
+        CREATE TABLE IF NOT EXISTS login_attempts (
+            key TEXT PRIMARY KEY,
+            window_start REAL NOT NULL,
+            current INTEGER NOT NULL,
+            previous INTEGER NOT NULL,
+            blocked_until REAL NOT NULL,
+            expires_at REAL NOT NULL
+        ) WITHOUT ROWID
+        """,
+        "CREATE INDEX IF NOT EXISTS ix_login_attempts_expires ON login_attempts(expires_at)",
+    )
+
+    def __init__(self, db_path: Path):
+        self.pool = get_pool(db_path)
+        with self.pool.connection() as conn, conn:
+            for statement in self.SCHEMA:
+                conn.execute(statement)
+
+    def get(self, key: str) -> Optional[WindowState]:
+        with self.pool.connection() as conn:
+            row = conn.execute("SELECT window_start, current, previous, blocked_until FROM login_attempts "
+                               "WHERE key = ?", (key,)).fetchone()
+        return WindowState(*row) if row else None
+
+    def update(self, key: str, mutate: Callable[[Optional[WindowState]], WindowState],
+               window: float) -> WindowState:
+        """O'qish-o'zgartirish-yozishni boshqa jarayonlar bilan poyga bo'lmasligi uchun bitta tranzaksiyada bajarish"""
+        with self.pool.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute("SELECT window_start, current, previous, blocked_until FROM login_attempts "
+                                   "WHERE key = ?", (key,)).fetchone()
+                state = mutate(WindowState(*row) if row else None)
+                conn.execute("INSERT OR REPLACE INTO login_attempts VALUES (?, ?, ?, ?, ?, ?)",
+                             (key, *state, _expires_at(state, window)))
+                conn.commit()
+            except sqlite3.Error:
+                conn.rollback()
+                raise
+        return state
+
+    def delete(self, key: str):
+        with self.pool.connection() as conn, conn:
+            conn.execute("DELETE FROM login_attempts WHERE key = ?", (key,))
+
+    def purge(self, now: float) -> int:
+        with self.pool.connection() as conn, conn:
+            return conn.execute("DELETE FROM login_attempts WHERE expires_at <= ?", (now,)).rowcount
+
+
+class LoginRateLimiter:
+    """Siljuvchi oyna bo'yicha xato urinishlarni sanash va chegaradan oshganda bloklash"""
+
+    def __init__(self, max_attempts: int = MAX_ATTEMPTS, window: float = WINDOW_SECONDS,
+                 block: float = BLOCK_SECONDS, store: Optional[SqliteRateLimitStore] = None,
+                 clock: Callable[[], float] = time.time, max_keys: int = MAX_TRACKED_KEYS):
+        self.max_attempts = max_attempts
+        self.window = window
+        self.block = block
+        self.store = store
+        self.clock = clock
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        # Oxirgi o'zgargan kalitlar oxirida: eskirganlari boshidan olib tashlanadi
+        self._states: "OrderedDict[str, WindowState]" = OrderedDict()
+        self._writes = 0
+
+    def _remember(self, key: str, state: Optional[WindowState]):
+        if state is None:
+            self._states.pop(key, None)
+            return
+        self._states[key] = state
+        self._states.move_to_end(key)
+        while len(self._states) > self.max_keys:
+            self._states.popitem(last=False)
+
+    def _evict(self, now: float):
+        while self._states:
+            key, state = next(iter(self._states.items()))
+            if _expires_at(state, self.window) > now:
+                break
+            del self._states[key]
+
+    def retry_after(self, key: str) -> float:
+        """Qancha soniyadan keyin urinish mumkin; 0 bo'lsa hozir ruxsat bor"""
+        now = self.clock()
+        with self._lock:
+            self._evict(now)
+            state = self._states.get(key)
+        if state and state.blocked_until > now:
+            return state.blocked_until - now
+
+        if self.store is not None:
+            # Boshqa worker shu kalitni bloklagan bo'lishi mumkin
+            state = self.store.get(key)
+            if state and state.blocked_until > now:
+                with self._lock:
+                    self._remember(key, state)
+                return state.blocked_until - now
+        return 0.0
+
+    def _fail(self, state: Optional[WindowState], now: float) -> WindowState:
+        state = _slide(state or WindowState(now), now, self.window)
+        state = state._replace(current=state.current + 1)
+        if _estimate(state, now, self.window) >= self.max_attempts:
+            # Blok tugagach hisob yangi oynadan boshlanadi: eski xatolar qayta bloklamaydi
+            blocked_until = now + self.block
+            state = WindowState(window_start=blocked_until, blocked_until=blocked_until)
+        return state
+
+    def record_failure(self, key: str) -> float:
+        """Xato urinishni hisobga olish; bloklangan bo'lsa kutish vaqtini qaytaradi"""
+        now = self.clock()
+        if self.store is not None:
+            state = self.store.update(key, lambda current: self._fail(current, now), self.window)
+            with self._lock:
+                self._remember(key, state)
+                self._writes += 1
+                purge = self._writes % PURGE_EVERY == 0
+            if purge:
+                self.store.purge(now)
+        else:
+            with self._lock:
+                state = self._fail(self._states.get(key), now)
+                self._remember(key, state)
+        return max(state.blocked_until - now, 0.0)
+
+    def reset(self, key: str):
+        """Muvaffaqiyatli kirishdan keyin kalit hisoblagichini tozalash"""
+        with self._lock:
+            self._remember(key, None)
+        if self.store is not None:
+            self.store.delete(key)
+
+
+_limiters: Dict[Optional[Path], LoginRateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_login_limiter(db_path: Optional[Path] = None, max_attempts: int = MAX_ATTEMPTS,
+                      window: float = WINDOW_SECONDS, block: float = BLOCK_SECONDS) -> LoginRateLimiter:
+    """Jarayon bo'yicha yagona cheklovchi; ``db_path`` berilsa holat shu SQLite faylida saqlanadi"""
+    key = Path(db_path) if db_path is not None else None
+    with _limiters_lock:
+        if key not in _limiters:
+            store = SqliteRateLimitStore(key) if key is not None else None
+            _limiters[key] = LoginRateLimiter(max_attempts, window, block, store=store)
+        return _limiters[key]
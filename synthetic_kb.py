@@ -0,0 +1,90 @@
+"""Sinov va o'lchovlar uchun sun'iy diagnosis_data.db yaratish.
+
+Simptomlar lug'ati ``--groups`` ta guruhga bo'lingan ``--symptoms`` ta
+nomdan iborat; har bir kasallik har bir simptomni ``--fill`` ehtimol bilan
+oladi (katalogdagi kabi guruh va simptom nomlari kasalliklar orasida
+takrorlanadi). Ma'lumotlar "Saqlash" oqimi — ``save_symptom_matrix`` orqali yoziladi.
+
+    python synthetic_kb.py -o /tmp/kb.db --diseases 200 --groups 20 --symptoms 2000 --fill 0.05
+"""
+import argparse
+import logging
+import random
+import sys
+from pathlib import Path
+from typing import List, NamedTuple, Optional, Sequence
+
+from database import SaveReport, get_connection, save_symptom_matrix
+from migrations import migrate
+
+logger = logging.getLogger(__name__)
+
+
+class KnowledgeBaseSpec(NamedTuple):
+    diseases: int = 50
+    groups: int = 10
+    symptoms: int = 500
+    fill: float = 0.05
+    # Qiymati 1 bo'lgan (simptom bor) kataklar ulushi, qolganlari 0
+    positive: float = 0.8
+    seed: int = 0
+
+
+def generate_matrix(spec: KnowledgeBaseSpec) -> List[list]:
+    """[kasallik, guruh, simptom, qiymat] qatorlari; bir xil ``seed`` bir xil natija beradi"""
+    if not 0 < spec.fill <= 1 or spec.groups < 1 or spec.symptoms < spec.groups:
+        raise ValueError(f"Noto'g'ri o'lchamlar: {spec}")
+
+    rng = random.Random(spec.seed)
+    vocabulary = [(f"Guruh {i % spec.groups + 1:03d}", f"Simptom {i + 1:05d}") for i in range(spec.symptoms)]
+    matrix = []
+    for d in range(spec.diseases):
+        disease = f"Kasallik {d + 1:05d}"
+        # Har bir kasallikda kamida bitta simptom bo'ladi
+        chosen = [s for s in vocabulary if rng.random() < spec.fill] or [rng.choice(vocabulary)]
+        for group, symptom in chosen:
+            matrix.append([disease, group, symptom, 1 if rng.random() < spec.positive else 0])
+    return matrix
+
+
+def build_database(path: Path, spec: KnowledgeBaseSpec) -> SaveReport:
+    """Yangi bazani sxema bilan yaratib, sun'iy ma'lumotlarni yozish"""
+    matrix = generate_matrix(spec)
+    with get_connection(path) as conn:
+        migrate(conn)
+        return save_symptom_matrix(conn, matrix)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Sun'iy bilimlar bazasini yaratish")
+    parser.add_argument('-o', '--output', type=Path, required=True)
+    parser.add_argument('--diseases', type=int)
+    parser.add_argument('--groups', type=int)
+    parser.add_argument('--symptoms', type=int)
+    parser.add_argument('--fill', type=float)
+    parser.add_argument('--positive', type=float)
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--force', action='store_true', help="mavjud faylni qayta yozish")
+    parser.set_defaults(**KnowledgeBaseSpec._field_defaults)
+    args = parser.parse_args(argv)
+
+    if args.output.exists():
+        if not args.force:
+            print(f"{args.output} allaqachon mavjud (--force bilan qayta yozing)", file=sys.stderr)
+            return 1
+        args.output.unlink()
+
+    spec = KnowledgeBaseSpec(args.diseases, args.groups, args.symptoms, args.fill, args.positive, args.seed)
+    try:
+        report = build_database(args.output, spec)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+    for field, count in report._asdict().items():
+        logger.info("%s: %d", field, count)
+    return 0
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    sys.exit(main())
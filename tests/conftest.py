@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Modullar repo ildizida joylashgan (paket emas)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
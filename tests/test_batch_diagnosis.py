@@ -0,0 +1,29 @@
+import csv
+import io
+import json
+
+import numpy as np
+
+from batch_diagnosis import run_batch, write_results
+from diagnosis_engine import DiagnosisEngine
+
+
+def test_patient_without_matching_symptoms_gets_empty_result():
+    matrix = np.array([[1, 1, 0], [0, 1, 0], [1, 0, 0]], dtype=np.float32)
+    engine = DiagnosisEngine(['A', 'B', 'C'], ['s1', 's2', 's3'], matrix)
+    # p2 da simptom yo'q, p3 dagi simptom hech bir kasallikda uchramaydi
+    patients = [('p1', [0]), ('p2', []), ('p3', [2])]
+
+    results = list(run_batch(patients, engine, top_k=5, workers=1))
+    assert [r['id'] for r in results] == ['p1', 'p2', 'p3']
+    assert [d['disease'] for d in results[0]['diagnoses']] == ['C', 'A']
+    assert results[1]['diagnoses'] == [] and results[2]['diagnoses'] == []
+
+    out = io.StringIO()
+    assert write_results(results, out, 'jsonl') == 3
+    assert [json.loads(line)['diagnoses'] for line in out.getvalue().splitlines()][1:] == [[], []]
+
+    out = io.StringIO()
+    assert write_results(results, out, 'csv') == 3
+    rows = list(csv.reader(io.StringIO(out.getvalue())))[1:]
+    assert rows[2:] == [['p2', '', '', '', ''], ['p3', '', '', '', '']]
@@ -0,0 +1,75 @@
+import numpy as np
+
+from catalog import ID_DTYPE, Columns
+from database import Delta, get_connection, load_knowledge_base, load_rows, load_snapshot, save_symptom_matrix
+from kb_cache import KnowledgeBaseCache
+from synthetic_kb import KnowledgeBaseSpec, build_database
+
+
+def ids(*values):
+    return np.array(values, dtype=ID_DTYPE)
+
+
+def test_patch_sorts_unordered_new_ids():
+    table = Columns(ids(1, 5), (ids(10, 50),))
+    patched = table.patch(ids(8, 6, 7), (ids(80, 60, 70),), ())
+    assert patched.ids.tolist() == [1, 5, 6, 7, 8]
+    assert patched.columns[0].tolist() == [10, 50, 60, 70, 80]
+    positions, found = patched.find(ids(6, 7, 8))
+    assert found.all()
+
+
+def test_patch_sorts_new_ids_below_existing():
+    table = Columns(ids(5, 9), (ids(50, 90),))
+    patched = table.patch(ids(9, 3), (ids(91, 30),), [5])
+    assert patched.ids.tolist() == [3, 9]
+    assert patched.columns[0].tolist() == [30, 91]
+
+
+def test_patched_catalog_matches_full_reload_after_bulk_save(tmp_path):
+    path = tmp_path / 'kb.db'
+    build_database(path, KnowledgeBaseSpec(diseases=5, groups=3, symptoms=30, fill=0.3, seed=1))
+
+    cache = KnowledgeBaseCache()
+
+    def loader():
+        with get_connection(path) as conn:
+            return load_snapshot(conn)
+
+    cache.get(loader)
+    # Bir nechta guruhda yangi simptomlar (mavjud va yangi guruhlar aralash)
+    matrix = [
+        ['Kasallik 00001', 'Guruh Z', 'Yangi simptom 1', 1],
+        ['Kasallik 00002', 'Guruh 001', 'Yangi simptom 2', 1],
+        ['Kasallik 00001', 'Guruh 002', 'Yangi simptom 3', 1],
+        ['Kasallik 00003', 'Guruh Y', 'Yangi simptom 4', 1],
+        ['Kasallik 00002', 'Guruh 003', 'Yangi simptom 5', 0],
+        ['Yangi kasallik', 'Guruh 001', 'Yangi simptom 6', 1],
+    ]
+    delta = Delta()
+    with get_connection(path) as conn:
+        save_symptom_matrix(conn, matrix, delta)
+        cache.apply(delta, lambda table, row_ids: load_rows(conn, table, row_ids))
+        expected = [sorted(map(tuple, rows)) for rows in load_knowledge_base(conn)]
+
+    version, catalog = cache.get(loader)
+    assert version == cache.version
+    assert [list(view) for view in catalog] == expected
+    assert all(np.all(np.diff(columns.ids) > 0) for columns in catalog.tables.values())
+
+
+def test_renames_do_not_grow_name_table_without_bound(monkeypatch):
+    import catalog as catalog_module
+
+    monkeypatch.setattr(catalog_module, 'NAMES_SLACK', 4)
+    catalog = catalog_module.Catalog.from_rows(
+        [(1, 'Kasallik'), (2, 'Boshqa')],
+        [(1, 1, 'Guruh', 'Kasallik')],
+        [(1, 1, 'Simptom', 'Guruh')],
+        [(1, 1, 1, 1, 'Kasallik', 'Simptom', 'Guruh')])
+    for i in range(100):
+        catalog = catalog.patch({'diseases': ([(1, f'Kasallik {i}')], ())})
+        assert len(catalog.names.names) <= 2 * 4 + 4 + 1
+
+    assert list(catalog[0]) == [(1, 'Kasallik 99'), (2, 'Boshqa')]
+    assert list(catalog[3]) == [(1, 1, 1, 1, 'Kasallik 99', 'Simptom', 'Guruh')]
@@ -0,0 +1,17 @@
+from database import fetch_page, get_connection
+from synthetic_kb import KnowledgeBaseSpec, build_database
+
+
+def test_fetch_page_search_ignores_case_for_cyrillic(tmp_path):
+    path = tmp_path / 'kb.db'
+    build_database(path, KnowledgeBaseSpec(diseases=3, groups=2, symptoms=10, fill=0.5))
+    with get_connection(path) as conn:
+        conn.execute("INSERT INTO diseases (name) VALUES ('Ревматоидный артрит'), ('Подагра 100%')")
+        conn.commit()
+
+        for search in ('артрит', 'АРТРИТ', 'Артрит'):
+            rows, has_next = fetch_page(conn, 'diseases', search=search)
+            assert [row[1] for row in rows] == ['Ревматоидный артрит'] and not has_next
+        # % oddiy belgi sifatida qidiriladi
+        assert [row[1] for row in fetch_page(conn, 'diseases', search='100%')[0]] == ['Подагра 100%']
+        assert fetch_page(conn, 'diseases', search='_')[0] == []
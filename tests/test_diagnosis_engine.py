@@ -0,0 +1,32 @@
+import numpy as np
+
+from diagnosis_engine import DiagnosisEngine, InvertedIndex
+
+
+def make_engine(seed=0, diseases=40, symptoms=30):
+    rng = np.random.default_rng(seed)
+    matrix = (rng.random((diseases, symptoms)) < 0.2).astype(np.float32)
+    return DiagnosisEngine([f"d{i}" for i in range(diseases)], [f"s{j}" for j in range(symptoms)], matrix)
+
+
+def test_dense_ranking_skips_zero_score_diseases():
+    engine = make_engine()
+    assert engine.rank([], 5) == []
+    assert engine.rank_matrix(np.zeros((2, engine.shape[1])), 5) == [[], []]
+    for diagnoses in engine.rank_matrix(np.eye(engine.shape[1])[:5], 10):
+        assert all(d.score > 0 for d in diagnoses)
+
+
+def test_dense_and_inverted_rankings_agree():
+    engine = make_engine()
+    index = InvertedIndex.from_engine(engine)
+    rng = np.random.default_rng(1)
+    for _ in range(200):
+        columns = rng.choice(engine.shape[1], rng.integers(0, 4), replace=False)
+        names = [engine.symptom_names[j] for j in columns]
+        query = np.zeros((1, engine.shape[1]), dtype=np.float32)
+        query[0, columns] = 1
+
+        expected = [round(score, 5) for _, score, _ in index.rank(names, 5)]
+        assert [round(d.score, 5) for d in engine.rank(names, 5)] == expected
+        assert [round(d.score, 5) for d in engine.rank_matrix(query, 5)[0]] == expected
@@ -0,0 +1,19 @@
+import io
+import zipfile
+
+import pytest
+
+from excel_import import INVALID_WORKBOOK_ERRORS, iter_sheet
+
+
+def zip_without_workbook():
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        archive.writestr('a.txt', 'x')
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize('data', [b'not an xlsx file', b'PK\x03\x04truncated', zip_without_workbook()])
+def test_unreadable_upload_raises_invalid_workbook_error(data):
+    with pytest.raises(INVALID_WORKBOOK_ERRORS):
+        iter_sheet(io.BytesIO(data))
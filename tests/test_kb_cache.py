@@ -0,0 +1,50 @@
+import sqlite3
+
+import pytest
+
+from database import get_connection, load_knowledge_base, load_snapshot
+from kb_cache import insert_missing, kb_cache, typeahead_options
+from synthetic_kb import KnowledgeBaseSpec, build_database
+
+
+def test_insert_missing_updates_shared_snapshot(tmp_path):
+    path = tmp_path / 'kb.db'
+    build_database(path, KnowledgeBaseSpec(diseases=3, groups=2, symptoms=10, fill=0.5))
+
+    def loader():
+        with get_connection(path) as conn:
+            return load_snapshot(conn)
+
+    kb_cache.invalidate()
+    kb_cache.get(loader)
+    with get_connection(path) as conn:
+        disease_id = insert_missing(conn, 'diseases', {'name': 'Yangi kasallik'})
+        assert insert_missing(conn, 'diseases', {'name': 'Yangi kasallik'}) == disease_id
+        group_id = insert_missing(conn, 'symptom_groups', {'disease_id': disease_id, 'group_name': 'Guruh'})
+        expected = [sorted(map(tuple, rows)) for rows in load_knowledge_base(conn)]
+
+    _, catalog = kb_cache.get(loader)
+    assert [list(view) for view in catalog] == expected
+    assert (group_id, disease_id, 'Guruh', 'Yangi kasallik') in list(catalog[1])
+
+    options, index = typeahead_options('diseases', loader, lambda data: {d[1]: d[0] for d in data[0]})
+    assert options['Yangi kasallik'] == disease_id
+    assert 'Yangi kasallik' in index.search('yangi')
+
+
+def test_insert_missing_raises_and_keeps_cache_on_constraint_error(tmp_path):
+    path = tmp_path / 'kb.db'
+    build_database(path, KnowledgeBaseSpec(diseases=3, groups=2, symptoms=10, fill=0.5))
+
+    def loader():
+        with get_connection(path) as conn:
+            return load_snapshot(conn)
+
+    kb_cache.invalidate()
+    version, catalog = kb_cache.get(loader)
+    with get_connection(path) as conn:
+        with pytest.raises(sqlite3.IntegrityError):
+            # Kasallik nomi foreign key ustuniga yozilmaydi
+            insert_missing(conn, 'symptom_groups', {'disease_id': 'Kasallik', 'group_name': 'Guruh'})
+        assert conn.execute("SELECT COUNT(*) FROM symptom_groups WHERE group_name = 'Guruh'").fetchone()[0] == 0
+    assert kb_cache.get(loader) == (version, catalog)
@@ -0,0 +1,36 @@
+from rate_limiter import LoginRateLimiter, SqliteRateLimitStore
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_single_failure_after_block_expires_does_not_reblock(tmp_path):
+    for store in (None, SqliteRateLimitStore(tmp_path / 'attempts.db')):
+        clock = FakeClock()
+        limiter = LoginRateLimiter(max_attempts=3, window=900, block=900, store=store, clock=clock)
+        for _ in range(2):
+            assert limiter.record_failure('doctor:ali') == 0
+        assert limiter.record_failure('doctor:ali') == 900
+        assert limiter.retry_after('doctor:ali') == 900
+
+        clock.now += 900
+        assert limiter.retry_after('doctor:ali') == 0
+        assert limiter.record_failure('doctor:ali') == 0
+        assert limiter.retry_after('doctor:ali') == 0
+
+
+def test_failures_after_block_expires_count_in_a_fresh_window():
+    clock = FakeClock()
+    limiter = LoginRateLimiter(max_attempts=3, window=900, block=900, clock=clock)
+    for _ in range(3):
+        limiter.record_failure('doctor:ali')
+
+    clock.now += 900
+    assert limiter.record_failure('doctor:ali') == 0
+    assert limiter.record_failure('doctor:ali') == 0
+    assert limiter.record_failure('doctor:ali') == 900
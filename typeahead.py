@@ -0,0 +1,75 @@
+import heapq
+import re
+from collections import defaultdict
+from typing import Dict, Iterable, List
+
+import numpy as np
+
+SEARCH_LIMIT = 20
+RERANK_FACTOR = 4
+
+# Kirill (rus va o'zbek) harflarini lotinchaga o'girish: "Артрит" va "artrit" bir xil topiladi
+CYRILLIC_TO_LATIN = str.maketrans({
+    'а': 'a', 'б': 'b', 'в': 'v', 'г': 'g', 'д': 'd', 'е': 'e', 'ё': 'yo', 'ж': 'j',
+    'з': 'z', 'и': 'i', 'й': 'y', 'к': 'k', 'л': 'l', 'м': 'm', 'н': 'n', 'о': 'o',
+    'п': 'p', 'р': 'r', 'с': 's', 'т': 't', 'у': 'u', 'ф': 'f', 'х': 'x', 'ц': 'ts',
+    'ч': 'ch', 'ш': 'sh', 'щ': 'sh', 'ъ': '', 'ы': 'i', 'ь': '', 'э': 'e', 'ю': 'yu',
+    'я': 'ya', 'ў': 'o', 'қ': 'q', 'ғ': 'g', 'ҳ': 'h',
+})
+NON_WORD = re.compile(r"[^0-9a-z]+")
+
+
+def normalize_text(text: str) -> str:
+    """Katta-kichik harf, alifbo va tinish belgilaridan qat'i nazar solishtiriladigan ko'rinish"""
+    text = str(text).casefold().translate(CYRILLIC_TO_LATIN)
+    # o‘, g‘ kabi harflardagi apostrof variantlari olib tashlanadi
+    text = re.sub(r"[‘’ʻʼ`']", '', text)
+    return NON_WORD.sub(' ', text).strip()
+
+
+def trigrams(text: str) -> set:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TypeaheadIndex:
+    """Nomlar ustidan trigram indeksi: yozilgan so'rov uchun eng mos natijalarni qaytaradi.
+
+    Tanlash ro'yxatlariga butun katalog emas, faqat shu qisqa natijalar beriladi.
+    """
+
+    def __init__(self, labels: Iterable[str]):
+        self.labels: List[str] = list(dict.fromkeys(labels))
+        self._normalized = [normalize_text(label) for label in self.labels]
+        postings: Dict[str, List[int]] = defaultdict(list)
+        for i, text in enumerate(self._normalized):
+            for gram in trigrams(text):
+                postings[gram].append(i)
+        self._postings = {gram: np.array(ids, dtype=np.int32) for gram, ids in postings.items()}
+
+    def __len__(self):
+        return len(self.labels)
+
+    def search(self, query: str, limit: int = SEARCH_LIMIT) -> List[str]:
+        query = normalize_text(query)
+        if not query:
+            return self.labels[:limit]
+
+        grams = trigrams(query)
+        lists = [self._postings[gram] for gram in grams if gram in self._postings]
+        if not lists:
+            return []
+        counts = np.bincount(np.concatenate(lists), minlength=len(self.labels))
+
+        # Kamida yarim trigramlari mos kelgan nomlargina ko'rib chiqiladi, ulardan ham eng ko'p moslari
+        candidates = np.flatnonzero(counts >= max(1, len(grams) // 2))
+        if len(candidates) > limit * RERANK_FACTOR:
+            best = np.argpartition(-counts[candidates], limit * RERANK_FACTOR - 1)[:limit * RERANK_FACTOR]
+            candidates = candidates[best]
+
+        def score(i: int):
+            text = self._normalized[i]
+            # Avval to'liq qism-satr mosligi, so'ng umumiy trigramlar ulushi, qisqa nomlar oldinroq
+            return (query in text, text.startswith(query), counts[i] / len(grams), -len(text))
+
+        return [self.labels[i] for i in heapq.nlargest(limit, candidates.tolist(), key=score)]